@@ -0,0 +1,263 @@
+"""Tile hattı benchmark'ları (ağ gerektirmez)
+
+İndirme hızı - eşzamanlılık, tile server gecikme yüzdelikleri ve tile matematiği
+hızını ölçer; sonuçları JSON olarak kaydeder. --compare ile önceki bir sonuç
+dosyasına göre değişimi yazdırır.
+
+    python benchmarks/run_benchmarks.py --output sonuc.json
+    python benchmarks/run_benchmarks.py --quick --compare sonuc.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from download_planner import plan_regions, plan_tiles
+from stub_origin import StubTileOrigin
+from tile_download import TileDownloadEngine
+from tile_math import NUMPY_AVAILABLE, calculate_tile_bounds, deg2num, deg2num_array, tile_bounds_array
+from tile_server import TileServer
+from tile_store import DirectoryTileStore, MBTilesTileStore
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def latency_summary(latencies):
+    """Saniye cinsinden gecikmelerden milisaniye yüzdelikleri"""
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'mean_ms': sum(values) / len(values) * 1000 if values else 0.0,
+        'p50_ms': percentile(values, 0.50) * 1000,
+        'p90_ms': percentile(values, 0.90) * 1000,
+        'p99_ms': percentile(values, 0.99) * 1000,
+        'max_ms': values[-1] * 1000 if values else 0.0,
+    }
+
+
+def make_store(backend, directory):
+    if backend == 'mbtiles':
+        return MBTilesTileStore(os.path.join(directory, 'bench.mbtiles'))
+    return DirectoryTileStore(os.path.join(directory, 'tiles'))
+
+
+def bench_download(concurrency_levels, tile_count, latency, backend):
+    """Yapay gecikmeli yerel kaynaktan indirme hızı (tile/s) - eşzamanlılık"""
+    tiles = [(18, 150000 + i % 100, 100000 + i // 100) for i in range(tile_count)]
+    results = []
+    with StubTileOrigin(latency=latency) as origin:
+        for workers in concurrency_levels:
+            with tempfile.TemporaryDirectory() as directory:
+                store = make_store(backend, directory)
+                engine = TileDownloadEngine(
+                    store, max_workers=workers, url_template=origin.url_template, rate_limit=None
+                )
+                start = time.perf_counter()
+                success, failed, _ = engine.download(tiles)
+                elapsed = time.perf_counter() - start
+                engine.close()
+                store.close()
+            results.append({
+                'workers': workers,
+                'tiles': tile_count,
+                'failed': failed,
+                'seconds': elapsed,
+                'tiles_per_second': success / elapsed if elapsed else 0.0,
+            })
+            print(f"  indirme {workers:>3} işçi: {results[-1]['tiles_per_second']:8.1f} tile/s")
+    return {'origin_latency_ms': latency * 1000, 'backend': backend, 'runs': results}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_server_load(port, tiles, client_count, requests_per_client):
+    """Her istemci kendi keep-alive bağlantısıyla rastgele tile ister"""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        local = []
+        for _ in range(requests_per_client):
+            zoom, x, y = rng.choice(tiles)
+            start = time.perf_counter()
+            conn.request('GET', f'/{zoom}/{x}/{y}.png')
+            response = conn.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(client_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    summary = latency_summary(latencies)
+    summary['requests_per_second'] = len(latencies) / elapsed if elapsed else 0.0
+    return summary
+
+
+def bench_server(tile_count, client_count, requests_per_client, backend):
+    """Paralel yük altında tile server gecikmesi (soğuk ve ısınmış önbellek)"""
+    tiles = [(16, 40000 + i % 64, 30000 + i // 64) for i in range(tile_count)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(backend, directory)
+        data = b'\xff\xd8\xff\xe0' + os.urandom(20000)
+        for tile in tiles:
+            store.put_tile(*tile, data)
+        store.flush()
+
+        port = free_port()
+        server = TileServer(store, port=port)
+        server.start()
+        if not server.wait_ready(5.0):
+            raise RuntimeError(f"Tile server {port} portunda başlamadı")
+        try:
+            cold = run_server_load(port, tiles, client_count, requests_per_client)
+            warm = run_server_load(port, tiles, client_count, requests_per_client)
+        finally:
+            server.stop()
+            store.close()
+    for name, summary in (('soğuk', cold), ('ılık', warm)):
+        print(f"  server {name}: p50 {summary['p50_ms']:.2f} ms, p99 {summary['p99_ms']:.2f} ms, "
+              f"{summary['requests_per_second']:.0f} istek/s")
+    return {'backend': backend, 'clients': client_count, 'tiles': tile_count, 'cold': cold, 'warm': warm}
+
+
+def measure_rate(function, iterations):
+    start = time.perf_counter()
+    function(iterations)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed else 0.0
+
+
+def bench_tile_math(iterations):
+    """Tile matematiği ve bölge planlama hızı (çağrı/s)"""
+    rng = random.Random(0)
+    points = [(rng.uniform(36.0, 42.0), rng.uniform(26.0, 45.0)) for _ in range(1000)]
+
+    def run_deg2num(count):
+        for i in range(count):
+            lat, lon = points[i % 1000]
+            deg2num(lat, lon, 18)
+
+    def run_bounds(count):
+        for i in range(count):
+            lat, lon = points[i % 1000]
+            calculate_tile_bounds(lat, lon, 800, 18)
+
+    def run_plan(count):
+        for i in range(count):
+            lat, lon = points[i % 1000]
+            plan_tiles({'type': 'circle', 'lat': lat, 'lon': lon, 'radius': 800}, [14, 15, 16, 17, 18])
+
+    results = {
+        'deg2num_per_second': measure_rate(run_deg2num, iterations),
+        'calculate_tile_bounds_per_second': measure_rate(run_bounds, iterations),
+        'plan_circle_per_second': measure_rate(run_plan, max(1, iterations // 1000)),
+    }
+
+    if NUMPY_AVAILABLE:
+        lats = [lat for lat, _ in points] * max(1, iterations // 1000)
+        lons = [lon for _, lon in points] * max(1, iterations // 1000)
+        circles = [{'type': 'circle', 'lat': lat, 'lon': lon, 'radius': 800} for lat, lon in points[:100]]
+
+        # Dizi sürümlerinde oran, saniyede işlenen nokta/bölge sayısıdır
+        results['deg2num_array_per_second'] = measure_rate(lambda count: deg2num_array(lats, lons, 18), len(lats))
+        results['tile_bounds_array_per_second'] = measure_rate(
+            lambda count: tile_bounds_array(lats, lons, 800, 18), len(lats)
+        )
+        results['plan_regions_circles_per_second'] = measure_rate(
+            lambda count: plan_regions(circles, [14, 15, 16, 17, 18]), len(circles)
+        )
+    for name, value in results.items():
+        print(f"  {name}: {value:,.0f}")
+    return results
+
+
+def compare(results, baseline, path=()):
+    """Sayısal sonuçları önceki çalıştırmaya göre yüzde değişimle yazdır"""
+    if isinstance(results, dict):
+        for key, value in results.items():
+            if key in baseline:
+                compare(value, baseline[key], path + (key,))
+    elif isinstance(results, list):
+        for index, (value, old) in enumerate(zip(results, baseline)):
+            compare(value, old, path + (str(index),))
+    elif isinstance(results, (int, float)) and isinstance(baseline, (int, float)) and baseline:
+        change = (results - baseline) / baseline * 100
+        if abs(change) >= 5:
+            print(f"  {'.'.join(path)}: {baseline:.4g} → {results:.4g} ({change:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tile hattı benchmark'ları")
+    parser.add_argument('--output', help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument('--compare', help="Karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument('--quick', action='store_true', help="Kısa çalıştırma (duman testi)")
+    parser.add_argument('--backend', choices=('directory', 'mbtiles'), default='directory')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="Yapay kaynak gecikmesi")
+    args = parser.parse_args()
+
+    quick = args.quick
+    results = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+    print("İndirme hızı:")
+    results['download'] = bench_download(
+        [1, 4, 16] if quick else [1, 2, 4, 8, 16, 32],
+        tile_count=100 if quick else 500,
+        latency=args.latency_ms / 1000,
+        backend=args.backend,
+    )
+    print("Tile server:")
+    results['server'] = bench_server(
+        tile_count=256 if quick else 2048,
+        client_count=4 if quick else 16,
+        requests_per_client=100 if quick else 500,
+        backend=args.backend,
+    )
+    print("Tile matematiği:")
+    results['tile_math'] = bench_tile_math(20000 if quick else 200000)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Değişimler ({args.compare}, ±%5 üstü):")
+        compare(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Sonuçlar kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import http.server
+import threading
+import time
+
+
+# Geçerli JPEG başlığıyla başlayan sabit gövde; içerik türü tespiti için yeterli
+STUB_TILE = b'\xff\xd8\xff\xe0' + bytes(range(256)) * 64
+
+
+class StubOriginHandler(http.server.BaseHTTPRequestHandler):
+    """/{z}/{y}/{x} isteklerine sabit tile döndüren, isteğe bağlı gecikmeli handler"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # Aksi halde her yanıta ~40 ms gecikmeli ACK eklenir
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        body = self.server.tile_data
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"stub"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubTileOrigin:
+    """Ağ gerektirmeyen yerel tile kaynağı (ArcGIS yerine benchmark'larda kullanılır)
+
+    latency, her isteğe eklenen yapay sunucu gecikmesidir (saniye).
+    """
+    def __init__(self, latency=0.02, tile_data=STUB_TILE):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubOriginHandler)
+        self.server.daemon_threads = True
+        self.server.latency = latency
+        self.server.tile_data = tile_data
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url_template(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}/{{z}}/{{y}}/{{x}}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
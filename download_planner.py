@@ -0,0 +1,203 @@
+import math
+
+from tile_math import NUMPY_AVAILABLE, cover_circles, deg2xy, meters_per_tile
+
+
+MAX_SEGMENT_TILES = 8.0  # Uzun segmentler bu uzunlukta parçalara bölünerek taranır
+
+
+def _point_segment_distance(px, py, ax, ay, bx, by):
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return math.hypot(px - ax, py - ay)
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def _segments_intersect(ax, ay, bx, by, cx, cy, dx, dy):
+    def orient(px, py, qx, qy, rx, ry):
+        value = (qx - px) * (ry - py) - (qy - py) * (rx - px)
+        return (value > 0) - (value < 0)
+
+    o1 = orient(ax, ay, bx, by, cx, cy)
+    o2 = orient(ax, ay, bx, by, dx, dy)
+    o3 = orient(cx, cy, dx, dy, ax, ay)
+    o4 = orient(cx, cy, dx, dy, bx, by)
+    return o1 != o2 and o3 != o4
+
+
+def _segment_tile_distance(ax, ay, bx, by, tx, ty):
+    """Segment ile [tx, tx+1] x [ty, ty+1] tile karesi arasındaki mesafe (tile birimi)"""
+    # Uçlardan biri karenin içindeyse kesişiyor
+    if tx <= ax <= tx + 1 and ty <= ay <= ty + 1:
+        return 0.0
+    if tx <= bx <= tx + 1 and ty <= by <= ty + 1:
+        return 0.0
+
+    corners = ((tx, ty), (tx + 1, ty), (tx + 1, ty + 1), (tx, ty + 1))
+    for i in range(4):
+        cx, cy = corners[i]
+        dx, dy = corners[(i + 1) % 4]
+        if _segments_intersect(ax, ay, bx, by, cx, cy, dx, dy):
+            return 0.0
+
+    distance = min(_point_segment_distance(cx, cy, ax, ay, bx, by) for cx, cy in corners)
+    for px, py in ((ax, ay), (bx, by)):
+        nearest_x = min(max(px, tx), tx + 1)
+        nearest_y = min(max(py, ty), ty + 1)
+        distance = min(distance, math.hypot(px - nearest_x, py - nearest_y))
+    return distance
+
+
+def _capsule_tiles(ax, ay, bx, by, radius, tiles):
+    """Segmentin radius (tile birimi) mesafesindeki tile'ları kümeye ekle"""
+    min_x = math.floor(min(ax, bx) - radius)
+    max_x = math.floor(max(ax, bx) + radius)
+    min_y = math.floor(min(ay, by) - radius)
+    max_y = math.floor(max(ay, by) + radius)
+    for tx in range(min_x, max_x + 1):
+        for ty in range(min_y, max_y + 1):
+            if (tx, ty) not in tiles and _segment_tile_distance(ax, ay, bx, by, tx, ty) <= radius:
+                tiles.add((tx, ty))
+
+
+def corridor_tiles(points, buffer_m, zoom):
+    """Polyline'ı ([[lat, lon], ...]) buffer_m metre genişlikte kapsayan tile'lar
+
+    Tek noktalı liste, merkez + yarıçap dairesini verir.
+    """
+    tiles = set()
+    if not points:
+        return tiles
+    if len(points) == 1:
+        points = [points[0], points[0]]
+
+    for (lat1, lon1), (lat2, lon2) in zip(points, points[1:]):
+        ax, ay = deg2xy(lat1, lon1, zoom)
+        bx, by = deg2xy(lat2, lon2, zoom)
+        # Tile boyu kutuplara doğru küçülür; segmentin en yüksek enlemini kullanmak tile kaçırmaz
+        radius = buffer_m / meters_per_tile(max(abs(lat1), abs(lat2)), zoom)
+
+        pieces = max(1, math.ceil(math.hypot(bx - ax, by - ay) / MAX_SEGMENT_TILES))
+        for i in range(pieces):
+            start = i / pieces
+            end = (i + 1) / pieces
+            _capsule_tiles(
+                ax + (bx - ax) * start, ay + (by - ay) * start,
+                ax + (bx - ax) * end, ay + (by - ay) * end,
+                radius, tiles
+            )
+    return tiles
+
+
+def polygon_tiles(polygon, zoom):
+    """Poligonla ([[lat, lon], ...]) kesişen tüm tile'lar"""
+    if len(polygon) < 3:
+        return corridor_tiles(polygon, 0, zoom)
+
+    ring = [deg2xy(lat, lon, zoom) for lat, lon in polygon]
+
+    # Kenarların geçtiği tile'lar
+    tiles = set()
+    for (ax, ay), (bx, by) in zip(ring, ring[1:] + ring[:1]):
+        pieces = max(1, math.ceil(math.hypot(bx - ax, by - ay) / MAX_SEGMENT_TILES))
+        for i in range(pieces):
+            start = i / pieces
+            end = (i + 1) / pieces
+            _capsule_tiles(
+                ax + (bx - ax) * start, ay + (by - ay) * start,
+                ax + (bx - ax) * end, ay + (by - ay) * end,
+                0.0, tiles
+            )
+
+    # İç kısım: her tile satırının merkez çizgisinde scanline doldurma
+    min_y = math.floor(min(y for _, y in ring))
+    max_y = math.floor(max(y for _, y in ring))
+    for ty in range(min_y, max_y + 1):
+        center_y = ty + 0.5
+        crossings = []
+        for (ax, ay), (bx, by) in zip(ring, ring[1:] + ring[:1]):
+            if (ay > center_y) != (by > center_y):
+                crossings.append(ax + (center_y - ay) * (bx - ax) / (by - ay))
+        crossings.sort()
+        for left, right in zip(crossings[::2], crossings[1::2]):
+            for tx in range(math.ceil(left - 0.5), math.floor(right - 0.5) + 1):
+                tiles.add((tx, ty))
+    return tiles
+
+
+def bbox_tiles(south, west, north, east, zoom):
+    """Enlem/boylam kutusunu kapsayan tile'lar"""
+    min_x, min_y = deg2xy(north, west, zoom)
+    max_x, max_y = deg2xy(south, east, zoom)
+    return {
+        (tx, ty)
+        for tx in range(math.floor(min_x), math.floor(max_x) + 1)
+        for ty in range(math.floor(min_y), math.floor(max_y) + 1)
+    }
+
+
+def circle_tiles(circles, zoom):
+    """Daire bölgelerinin ({'lat', 'lon', 'radius'}) birleşik tile kümesi
+
+    NumPy varsa tüm daireler tek seferde vektörel hesaplanır.
+    """
+    if NUMPY_AVAILABLE:
+        covered = cover_circles(
+            [circle['lat'] for circle in circles],
+            [circle['lon'] for circle in circles],
+            [circle['radius'] for circle in circles],
+            zoom
+        )
+        return set(map(tuple, covered.tolist()))
+    tiles = set()
+    for circle in circles:
+        tiles |= corridor_tiles([[circle['lat'], circle['lon']]], circle['radius'], zoom)
+    return tiles
+
+
+def region_tiles(region, zoom):
+    """Bölge tanımı için tek zoom seviyesindeki tile kümesi
+
+    Desteklenen bölgeler:
+      {'type': 'circle', 'lat', 'lon', 'radius'}
+      {'type': 'corridor', 'points': [[lat, lon], ...], 'buffer'}
+      {'type': 'polygon', 'points': [[lat, lon], ...]}
+      {'type': 'bbox', 'south', 'west', 'north', 'east'}
+    """
+    kind = region['type']
+    if kind == 'circle':
+        return circle_tiles([region], zoom)
+    if kind == 'corridor':
+        return corridor_tiles(region['points'], region['buffer'], zoom)
+    if kind == 'polygon':
+        return polygon_tiles(region['points'], zoom)
+    if kind == 'bbox':
+        return bbox_tiles(region['south'], region['west'], region['north'], region['east'], zoom)
+    raise ValueError(f"Bilinmeyen bölge türü: {kind}")
+
+
+def plan_tiles(region, zoom_levels):
+    """Bölgeyi tüm zoom seviyelerinde kapsayan (zoom, x, y) listesi"""
+    tiles = []
+    for zoom in zoom_levels:
+        tiles.extend((zoom, x, y) for x, y in sorted(region_tiles(region, zoom)))
+    return tiles
+
+
+def plan_regions(regions, zoom_levels):
+    """Birden çok bölgenin birleşimini kapsayan (zoom, x, y) listesi
+
+    Daireler zoom başına tek vektörel çağrıda, diğer bölgeler tek tek planlanır.
+    """
+    circles = [region for region in regions if region['type'] == 'circle']
+    others = [region for region in regions if region['type'] != 'circle']
+    tiles = []
+    for zoom in zoom_levels:
+        covered = circle_tiles(circles, zoom) if circles else set()
+        for region in others:
+            covered |= region_tiles(region, zoom)
+        tiles.extend((zoom, x, y) for x, y in sorted(covered))
+    return tiles
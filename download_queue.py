@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+TILE_PENDING = 0
+TILE_DONE = 1
+TILE_FAILED = 2
+MAX_TILE_ATTEMPTS = 3  # Bu kadar başarısız çalıştırmadan sonra tile'dan vazgeçilir
+
+
+class DownloadQueue:
+    """SQLite'ta saklanan, kaldığı yerden devam edebilen tile indirme iş kuyruğu
+
+    Her iş; bölge tanımı, zoom seviyeleri ve tile bazında durum (bekliyor /
+    tamam / başarısız) tutar. Uygulama kapanırsa veya bağlantı koparsa iş
+    'pending' olarak kalır ve bir sonraki çalıştırmada yalnızca tamamlanmamış
+    tile'lar indirilir. MAX_TILE_ATTEMPTS kez başarısız olan (veya kaynağın
+    kalıcı olarak reddettiği) tile'lar tekrar denenmez; iş 'partial' olarak kapanır.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                region TEXT,
+                zooms TEXT,
+                status TEXT DEFAULT 'pending',
+                total INTEGER,
+                created_at REAL,
+                pyramid INTEGER DEFAULT 0,
+                refresh INTEGER DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS job_tiles (
+                job_id INTEGER,
+                zoom_level INTEGER,
+                tile_column INTEGER,
+                tile_row INTEGER,
+                status INTEGER DEFAULT 0,
+                attempts INTEGER DEFAULT 0,
+                PRIMARY KEY (job_id, zoom_level, tile_column, tile_row)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS job_tiles_status ON job_tiles (job_id, status);
+        """)
+        # Eski kuyruk dosyalarında sonradan eklenen kolonlar yok
+        columns = [row['name'] for row in conn.execute('PRAGMA table_info(jobs)')]
+        for column in ('pyramid', 'refresh'):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} INTEGER DEFAULT 0')
+        tile_columns = [row['name'] for row in conn.execute('PRAGMA table_info(job_tiles)')]
+        if 'attempts' not in tile_columns:
+            conn.execute('ALTER TABLE job_tiles ADD COLUMN attempts INTEGER DEFAULT 0')
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _job_from_row(row):
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'region': json.loads(row['region']),
+            'zooms': json.loads(row['zooms']),
+            'status': row['status'],
+            'total': row['total'],
+            'pyramid': bool(row['pyramid']),
+            'refresh': bool(row['refresh']),
+        }
+
+    def enqueue(self, name, region, zooms, tiles, pyramid=False, refresh=False):
+        """Yeni iş ekle; tiles = [(zoom, x, y), ...]. İş ID'sini döndürür.
+
+        pyramid=True ise indirme bitince alt zoom tile'ları yerelde üretilir.
+        refresh=True ise depoda olan tile'lar da koşullu istekle yenilenir.
+        """
+        tiles = list(dict.fromkeys(tiles))  # Sırayı koruyarak tekrarları at
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO jobs (name, region, zooms, status, total, created_at, pyramid, refresh) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (name, json.dumps(region), json.dumps(list(zooms)), 'pending', len(tiles), time.time(),
+                 int(pyramid), int(refresh))
+            )
+            job_id = cursor.lastrowid
+            conn.executemany(
+                'INSERT OR IGNORE INTO job_tiles (job_id, zoom_level, tile_column, tile_row) VALUES (?, ?, ?, ?)',
+                [(job_id, z, x, y) for z, x, y in tiles]
+            )
+        return job_id
+
+    def next_job(self, exclude=()):
+        """En eski bekleyen işi döndür (exclude'daki ID'ler hariç)"""
+        rows = self._connection().execute(
+            "SELECT * FROM jobs WHERE status='pending' ORDER BY id"
+        ).fetchall()
+        for row in rows:
+            if row['id'] not in exclude:
+                return self._job_from_row(row)
+        return None
+
+    def pending_jobs(self):
+        rows = self._connection().execute(
+            "SELECT * FROM jobs WHERE status='pending' ORDER BY id"
+        ).fetchall()
+        return [self._job_from_row(row) for row in rows]
+
+    def pending_tiles(self, job_id):
+        """İşin tamamlanmamış ve deneme hakkı bitmemiş tile'ları"""
+        rows = self._connection().execute(
+            'SELECT zoom_level, tile_column, tile_row FROM job_tiles WHERE job_id=? AND status!=? AND attempts<?',
+            (job_id, TILE_DONE, MAX_TILE_ATTEMPTS)
+        ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def mark_tiles(self, job_id, tiles, status, permanent=False):
+        """Tile durumlarını toplu güncelle
+
+        TILE_FAILED deneme sayısını artırır; permanent=True ise (ör. kaynakta
+        olmayan tile için 404) tile bir daha denenmez.
+        """
+        if not tiles:
+            return
+        if status != TILE_FAILED:
+            attempts_sql = 'attempts'
+        elif permanent:
+            attempts_sql = str(MAX_TILE_ATTEMPTS)
+        else:
+            attempts_sql = 'attempts + 1'
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                f'UPDATE job_tiles SET status=?, attempts={attempts_sql} '
+                'WHERE job_id=? AND zoom_level=? AND tile_column=? AND tile_row=?',
+                [(status, job_id, z, x, y) for z, x, y in tiles]
+            )
+
+    def progress(self, job_id):
+        """(tamamlanan, toplam) tile sayısı"""
+        conn = self._connection()
+        done = conn.execute(
+            'SELECT COUNT(*) FROM job_tiles WHERE job_id=? AND status=?', (job_id, TILE_DONE)
+        ).fetchone()[0]
+        total = conn.execute('SELECT total FROM jobs WHERE id=?', (job_id,)).fetchone()[0]
+        return done, total
+
+    def finish_job(self, job_id, status='done'):
+        """İşi kapat ve tile kayıtlarını sil"""
+        conn = self._connection()
+        with conn:
+            conn.execute('UPDATE jobs SET status=? WHERE id=?', (status, job_id))
+            conn.execute('DELETE FROM job_tiles WHERE job_id=?', (job_id,))
+
+    def cancel_job(self, job_id):
+        self.finish_job(job_id, status='cancelled')
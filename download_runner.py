@@ -0,0 +1,174 @@
+import time
+
+from download_planner import plan_tiles
+from download_queue import TILE_DONE, TILE_FAILED
+from tile_download import DEFAULT_MAX_WORKERS, TileDownloadEngine
+from tile_pyramid import PYRAMID_AVAILABLE, build_pyramid, split_derivable
+
+
+def enqueue_region(download_queue, name, region, zoom_levels, refresh=False, tile_metadata=None, max_age=None):
+    """Bölgeyi planla ve kuyruğa ekle. (iş ID, indirilecek, üretilecek) döndürür.
+
+    Pillow varsa alt zoom'lar en derin zoom'dan yerelde üretilir, yalnızca
+    kenar tile'ları indirilir. Yenilemede max_age (saniye) verilirse bu süreden
+    yeni alınmış tile'lar atlanır; yenilenecek tile kalmazsa iş eklenmez ve
+    iş ID'si None olur.
+    """
+    tiles = plan_tiles(region, zoom_levels)
+    derived_count = 0
+    if PYRAMID_AVAILABLE:
+        tiles, derived = split_derivable(tiles)
+        derived_count = len(derived)
+    if refresh and max_age is not None and tile_metadata is not None:
+        recent = tile_metadata.fetched_since(time.time() - max_age)
+        tiles = [tile for tile in tiles if tile not in recent]
+        if not tiles:
+            return None, 0, 0
+    job_id = download_queue.enqueue(
+        name, region, zoom_levels, tiles, pyramid=derived_count > 0, refresh=refresh
+    )
+    return job_id, len(tiles), derived_count
+
+
+class DownloadJobRunner:
+    """Kalıcı indirme kuyruğundaki işleri sırayla işleyen çalıştırıcı (Qt bağımsız)
+
+    Her iş için yalnızca tamamlanmamış tile'lar indirilir ve tile durumları
+    kuyruğa toplu halde yazılır; böylece uygulama kapanıp açılsa da indirme
+    kaldığı yerden devam eder. Arayüzdeki TileDownloader ve komut satırı
+    prefetch aracı bu sınıfı kullanır.
+    """
+    STATUS_BATCH_SIZE = 100  # Bu kadar tile'da bir kuyruğa yaz
+
+    def __init__(self, download_queue, tile_store, max_workers=DEFAULT_MAX_WORKERS, tile_metadata=None,
+                 progress_callback=None, **engine_options):
+        self.download_queue = download_queue
+        self.tile_store = tile_store
+        self.max_workers = max_workers
+        self.tile_metadata = tile_metadata
+        self.progress_callback = progress_callback  # (current, total)
+        self.engine_options = engine_options  # url_template, rate_limit, ...
+        self.engine = None
+        self.attempted_job_ids = set()
+        self.refreshed_count = 0  # Yenileme işlerinde içeriği değişen tile sayısı
+        self.stopped = False
+
+    def stop(self):
+        """Devam eden indirmeyi iptal et (iş kuyrukta kalır)"""
+        self.stopped = True
+        if self.engine:
+            self.engine.stop()
+
+    def _progress(self, current, total):
+        if self.progress_callback:
+            self.progress_callback(current, total)
+
+    def run(self, job_ids=None):
+        """Bekleyen işleri sırayla indir (job_ids verilirse yalnızca onları)
+
+        (başarılı, başarısız, toplam) tile sayılarını döndürür.
+        """
+        success_count = 0
+        failed_count = 0
+        total_tiles = 0
+
+        self.engine = TileDownloadEngine(
+            self.tile_store, max_workers=self.max_workers, tile_metadata=self.tile_metadata, **self.engine_options
+        )
+        try:
+            while not self.stopped:
+                # Bu çalıştırmada denenmiş işler (ör. hatalı tile'ı kalanlar) tekrar alınmaz
+                job = self._next_job(job_ids)
+                if job is None:
+                    break
+                self.attempted_job_ids.add(job['id'])
+
+                job_success, job_failed = self.run_job(job)
+                success_count += job_success
+                failed_count += job_failed
+                total_tiles += job['total']
+        finally:
+            self.engine.close()
+        return success_count, failed_count, total_tiles
+
+    def _next_job(self, job_ids):
+        if job_ids is None:
+            return self.download_queue.next_job(exclude=self.attempted_job_ids)
+        for job in self.download_queue.pending_jobs():
+            if job['id'] in job_ids and job['id'] not in self.attempted_job_ids:
+                return job
+        return None
+
+    def run_job(self, job):
+        """Tek bir işin kalan tile'larını indir. (başarılı, başarısız) döndürür."""
+        job_id = job['id']
+        total = job['total']
+        tiles = self.download_queue.pending_tiles(job_id)
+        already_done = total - len(tiles)
+        print(f"İş #{job_id} ({job['name']}): {len(tiles)}/{total} tile kaldı")
+
+        completed = []
+        failed = []
+        rejected = []  # Kaynağın kalıcı olarak reddettiği tile'lar (tekrar denenmez)
+
+        def record(tile, status):
+            if status in ('success', 'skipped', 'not_modified'):
+                completed.append(tile)
+            elif status == 'failed':
+                failed.append(tile)
+            elif status == 'rejected':
+                rejected.append(tile)
+            if len(completed) + len(failed) + len(rejected) >= self.STATUS_BATCH_SIZE:
+                flush_statuses()
+
+        def flush_statuses():
+            self.download_queue.mark_tiles(job_id, completed, TILE_DONE)
+            self.download_queue.mark_tiles(job_id, failed, TILE_FAILED)
+            self.download_queue.mark_tiles(job_id, rejected, TILE_FAILED, permanent=True)
+            completed.clear()
+            failed.clear()
+            rejected.clear()
+
+        success, failed_count, _ = self.engine.download(
+            tiles,
+            progress_callback=lambda current, _: self._progress(already_done + current, total),
+            tile_callback=record,
+            refresh=job['refresh']
+        )
+        flush_statuses()
+        if job['refresh']:
+            self.refreshed_count += success
+
+        done, _ = self.download_queue.progress(job_id)
+        # Deneme hakkı kalan tile yoksa iş kapanır; indirilemeyenler raporlanır
+        if done >= total or not self.download_queue.pending_tiles(job_id):
+            if job['pyramid']:
+                self.build_job_pyramid(job)
+            if self.stopped:
+                # Piramit yarım kaldı; iş bir sonraki çalıştırmada yeniden ele alınır
+                print(f"İş #{job_id} durduruldu (piramit tamamlanmadı)")
+                return success, failed_count
+            if done >= total:
+                self.download_queue.finish_job(job_id)
+                print(f"İş #{job_id} tamamlandı")
+            else:
+                self.download_queue.finish_job(job_id, status='partial')
+                print(f"İş #{job_id} kısmen tamamlandı: {total - done}/{total} tile indirilemedi")
+        else:
+            print(f"İş #{job_id} yarım kaldı: {done}/{total} (daha sonra devam edilecek)")
+        return success, failed_count
+
+    def build_job_pyramid(self, job):
+        """İndirilmeyen alt zoom tile'larını en derin zoom'dan üret"""
+        if not PYRAMID_AVAILABLE:
+            print("Pillow yüklü değil, alt zoom tile'ları üretilemedi!")
+            return
+        _, derived = split_derivable(plan_tiles(job['region'], job['zooms']))
+        print(f"İş #{job['id']}: {len(derived)} tile yerelde üretiliyor")
+        built, skipped = build_pyramid(
+            self.tile_store, derived,
+            progress_callback=self._progress,
+            should_stop=lambda: self.stopped,
+            overwrite=job['refresh']  # Yenilenen alt tile'lardan üst zoom'ları da yeniden üret
+        )
+        print(f"Piramit: {built} tile üretildi, {skipped} atlandı")
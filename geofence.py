@@ -0,0 +1,108 @@
+import math
+from collections import defaultdict
+
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEGREE = 111320
+DEFAULT_CELL_SIZE_DEG = 0.05  # ~5.5 km'lik grid hücreleri
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    """İki nokta arasındaki büyük daire mesafesi (haversine, metre)"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def point_in_polygon(lat, lon, polygon):
+    """Ray casting ile nokta poligonun içinde mi ([[lat, lon], ...])"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat):
+            cross_lon = lon_i + (lat - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if lon < cross_lon:
+                inside = not inside
+        j = i
+    return inside
+
+
+class GeofenceIndex:
+    """Yasaklı daireler ve uçuş alanı poligonları için grid tabanlı uzamsal indeks
+
+    Her bölge, sınırlayıcı kutusunun kesiştiği grid hücrelerine kaydedilir.
+    Sorguda yalnızca noktanın düştüğü hücredeki bölgeler kesin testten geçer,
+    bu yüzden yüzlerce bölge olsa da sorgu süresi hücredeki bölge sayısına bağlıdır.
+    """
+    def __init__(self, cell_size_deg=DEFAULT_CELL_SIZE_DEG):
+        self.cell_size = cell_size_deg
+        self._zones = {}  # zone_id -> (kind, data, cells)
+        self._grid = defaultdict(set)  # (cell_lat, cell_lon) -> {zone_id}
+
+    def __len__(self):
+        return len(self._zones)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def _cells_for_bbox(self, south, west, north, east):
+        min_row, min_col = self._cell(south, west)
+        max_row, max_col = self._cell(north, east)
+        return [(row, col) for row in range(min_row, max_row + 1) for col in range(min_col, max_col + 1)]
+
+    def _insert(self, zone_id, kind, data, bbox):
+        self.remove(zone_id)
+        cells = self._cells_for_bbox(*bbox)
+        for cell in cells:
+            self._grid[cell].add(zone_id)
+        self._zones[zone_id] = (kind, data, cells)
+
+    def add_circle(self, zone_id, latitude, longitude, radius_m):
+        """Dairesel bölge ekle (merkez + yarıçap metre)"""
+        lat_offset = radius_m / METERS_PER_DEGREE
+        lon_offset = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+        bbox = (latitude - lat_offset, longitude - lon_offset, latitude + lat_offset, longitude + lon_offset)
+        self._insert(zone_id, 'circle', (latitude, longitude, radius_m), bbox)
+
+    def add_polygon(self, zone_id, coordinates):
+        """Poligon bölge ekle ([[lat, lon], ...])"""
+        polygon = [(float(lat), float(lon)) for lat, lon in coordinates]
+        lats = [p[0] for p in polygon]
+        lons = [p[1] for p in polygon]
+        self._insert(zone_id, 'polygon', polygon, (min(lats), min(lons), max(lats), max(lons)))
+
+    def remove(self, zone_id):
+        zone = self._zones.pop(zone_id, None)
+        if zone is None:
+            return
+        for cell in zone[2]:
+            ids = self._grid.get(cell)
+            if ids:
+                ids.discard(zone_id)
+                if not ids:
+                    del self._grid[cell]
+
+    def clear(self):
+        self._zones.clear()
+        self._grid.clear()
+
+    def kind(self, zone_id):
+        zone = self._zones.get(zone_id)
+        return zone[0] if zone else None
+
+    def query(self, latitude, longitude):
+        """Noktayı içeren bölge ID'lerini döndür"""
+        result = set()
+        for zone_id in self._grid.get(self._cell(latitude, longitude), ()):
+            kind, data, _ = self._zones[zone_id]
+            if kind == 'circle':
+                if distance_m(latitude, longitude, data[0], data[1]) <= data[2]:
+                    result.add(zone_id)
+            elif point_in_polygon(latitude, longitude, data):
+                result.add(zone_id)
+        return result
@@ -0,0 +1,17 @@
+import base64
+import functools
+import os
+
+
+@functools.lru_cache(maxsize=None)
+def load_base64_icon(filename):
+    """SVG ikonunu bir kez okuyup base64 olarak önbellekte tut"""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    file_path = os.path.join(base_dir, filename)
+    try:
+        with open(file_path, 'r') as file:
+            svg_data = file.read()
+        return base64.b64encode(svg_data.encode()).decode()
+    except FileNotFoundError:
+        print(f"Error: '{filename}' not found in {base_dir}")
+        return ""
@@ -0,0 +1,142 @@
+import json
+import math
+import os
+import threading
+import time
+
+
+# MAP_METRICS=1 ile açılır; kapalıyken tüm çağrılar boş metotlara gider
+ENABLED = os.environ.get('MAP_METRICS', '').lower() in ('1', 'true', 'yes', 'on')
+DEFAULT_DUMP_INTERVAL = 10.0  # saniye
+
+
+class Histogram:
+    """Log2 kovalı histogram; saniye ve bayt gibi farklı ölçekler için ortak
+
+    Her değer 2'nin kuvveti sınırlı kovasına sayılır, yüzdelikler kova üst
+    sınırından yaklaşık olarak hesaplanır.
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = {}  # üs -> sayı (değer <= 2**üs)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        exponent = math.frexp(value)[1] if value > 0 else -1074
+        self.buckets[exponent] = self.buckets.get(exponent, 0) + 1
+
+    def quantile(self, fraction):
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for exponent in sorted(self.buckets):
+            seen += self.buckets[exponent]
+            if seen >= target:
+                return min(self.max, math.ldexp(1.0, exponent))
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.50),
+            'p90': self.quantile(0.90),
+            'p99': self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe sayaç ve histogram kaydı"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._started = time.monotonic()
+        self._last_snapshot = (self._started, {})
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def snapshot(self):
+        """Anlık durum; 'rates' bir önceki snapshot'tan bu yana saniyedeki artıştır"""
+        now = time.monotonic()
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {name: histogram.to_dict() for name, histogram in self._histograms.items()}
+            last_time, last_counters = self._last_snapshot
+            self._last_snapshot = (now, counters)
+        interval = now - last_time
+        rates = {
+            name: (value - last_counters.get(name, 0)) / interval if interval > 0 else 0.0
+            for name, value in counters.items()
+        }
+        return {
+            'enabled': True,
+            'uptime_seconds': now - self._started,
+            'counters': counters,
+            'rates': rates,
+            'histograms': histograms,
+        }
+
+
+class NullRegistry:
+    """Metrikler kapalıyken kullanılan, hiçbir şey yapmayan kayıt"""
+    def inc(self, name, value=1):
+        pass
+
+    def observe(self, name, value):
+        pass
+
+    def snapshot(self):
+        return {'enabled': False}
+
+
+REGISTRY = MetricsRegistry() if ENABLED else NullRegistry()
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+snapshot = REGISTRY.snapshot
+
+
+def start_periodic_dump(path=None, interval=None):
+    """Metrikleri arka planda periyodik olarak JSON dosyasına yaz
+
+    Yol ve süre verilmezse MAP_METRICS_DUMP / MAP_METRICS_INTERVAL ortam
+    değişkenlerinden okunur. Metrikler kapalıysa veya yol yoksa None döner.
+    """
+    path = path or os.environ.get('MAP_METRICS_DUMP')
+    if not ENABLED or not path:
+        return None
+    interval = interval or float(os.environ.get('MAP_METRICS_INTERVAL', DEFAULT_DUMP_INTERVAL))
+
+    def dump_loop():
+        while True:
+            time.sleep(interval)
+            tmp_path = f'{path}.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot(), f, indent=2)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Metrik dosyası yazılamadı: {e}")
+
+    thread = threading.Thread(target=dump_loop, name='metrics-dump', daemon=True)
+    thread.start()
+    return thread
@@ -1,72 +1,275 @@
 import sys
-import base64
+import contextlib
+import itertools
+import json
 import os
-import requests
 import threading
 import urllib.parse
-from pathlib import Path
 import urllib.request
 import urllib.error
-import http.server
-import socketserver
-from threading import Thread
 import time
+from collections import OrderedDict
 from PySide6.QtWidgets import QApplication, QMainWindow, QProgressBar, QVBoxLayout, QWidget
 from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtCore import QObject, Signal, Slot, QThread, QUrl
+from PySide6.QtCore import QObject, Signal, Slot, QThread, QTimer, QUrl
 from PySide6.QtWebChannel import QWebChannel
+import metrics
+from tile_download import ARCGIS_TILE_URL, DEFAULT_MAX_WORKERS
+from tile_store import DirectoryTileStore, TileMetadata, open_mbtiles
+from tile_server import TileServer
+from map_icons import load_base64_icon
+from geofence import GeofenceIndex
+from download_queue import DownloadQueue
+from download_runner import DownloadJobRunner, enqueue_region
+from tile_math import deg2num, calculate_tile_bounds
 
 
-class TileServer(Thread):
-    """Yerel tile dosyalarını serve eden HTTP server"""
-    def __init__(self, tiles_dir, port=8000):
-        super().__init__(daemon=True)
-        self.tiles_dir = tiles_dir
-        self.port = port
-        self.server = None
-        
-    def run(self):
+DOWNLOAD_ZOOM_LEVELS = [14, 15, 16, 17, 18]
+MAX_DISPLAY_ZOOM = 21
+CORRIDOR_BUFFER_M = 500  # Rota boyunca indirilecek koridorun yarı genişliği
+ROUTE_CHUNK_SIZE = 500  # Uçuş rotası parçası başına en fazla nokta
+DEFAULT_RENDER_FPS = 30  # Harita güncellemelerinin en yüksek gönderim hızı
+# 'canvas': nokta ve şekil katmanları tür başına tek canvas'a çizilir (binlerce nesne için)
+# 'dom': her nesne ayrı DOM elemanı (eski davranış)
+RENDER_MODES = ('canvas', 'dom')
+DEFAULT_RENDER_MODE = 'canvas'
+CONTACT_STALE_SECONDS = 30.0  # Bu süre güncellenmeyen temaslar haritadan kaldırılır
+TILE_SERVER_START_TIMEOUT = 5.0  # saniye
+LEAFLET_CDN_URL = 'https://unpkg.com/leaflet@1.9.4/dist'
+DEFAULT_CENTER = (37.951, 32.500)
+
+
+class StartupProfiler:
+    """Başlangıç aşamalarının sürelerini toplayıp bir kez rapor eden yardımcı
+
+    Aşamalar UI veya arka plan thread'inde ölçülebilir; raporda her satır,
+    başlangıçtan itibaren bittiği anı ve kendi süresini gösterir.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.entries = []  # (etiket, thread adı, süre veya None, bitiş anı)
+        self.reported = False
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name, label):
+        start = time.perf_counter()
         try:
-            # Tiles dizinine geç
-            os.chdir(self.tiles_dir)
-            
-            # HTTP server başlat
-            handler = http.server.SimpleHTTPRequestHandler
-            self.server = socketserver.TCPServer(("", self.port), handler)
-            print(f"Tile server başlatıldı: http://localhost:{self.port}")
-            self.server.serve_forever()
-        except Exception as e:
-            print(f"Tile server hatası: {e}")
-    
+            yield
+        finally:
+            self._record(name, label, time.perf_counter() - start)
+
+    def mark(self, name, label):
+        """Başlangıçtan bu ana kadar geçen süreyi kaydet (ör. pencere görünür)"""
+        self._record(name, label, None)
+
+    def _record(self, name, label, duration):
+        elapsed = time.perf_counter() - self.started
+        metrics.observe(f'startup.{name}_seconds', elapsed if duration is None else duration)
+        with self._lock:
+            if not self.reported:
+                self.entries.append((label, threading.current_thread().name, duration, elapsed))
+
+    def report(self):
+        with self._lock:
+            if self.reported:
+                return
+            self.reported = True
+            entries = sorted(self.entries, key=lambda entry: entry[3])
+        print("Başlangıç süreleri:")
+        for label, thread_name, duration, elapsed in entries:
+            if duration is None:
+                print(f"  {elapsed * 1000:8.1f} ms  {label}")
+            else:
+                where = 'UI' if thread_name == 'MainThread' else thread_name
+                print(f"  {elapsed * 1000:8.1f} ms  {label} ({duration * 1000:.1f} ms, {where})")
+
+
+# Uygulama genelinde tek başlangıç ölçümü (modül yüklendiği andan itibaren)
+startup_profiler = StartupProfiler()
+
+
+class RenderScheduler(QObject):
+    """Harita güncellemelerini biriktirip kare hızı sınırıyla tek mesaj paketi olarak gönderir
+
+    Güncellemeler [işlem, argümanlar...] biçiminde mesajlardır ve web/map.js'teki
+    render modülünde karşılanır; sayfada her seferinde yeni JavaScript derlenmez.
+    schedule(key, ...) ile gönderilenler aynı anahtarda birleşir (son değer
+    kazanır); append(...) ile gönderilenler sırayla korunur. Değer bir mesaj ya
+    da gönderim anında mesaj listesi üreten bir fonksiyon olabilir; böylece
+    yüksek hızlı telemetride her karede yalnızca en son durum gönderilir.
+    """
+    def __init__(self, send, max_fps=DEFAULT_RENDER_FPS):
+        super().__init__()
+        self.send = send  # JSON paketini sayfaya ileten fonksiyon (QWebChannel sinyali)
+        self._pending = OrderedDict()
+        self._sequence = itertools.count()
+        self._last_flush = 0.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self.set_max_fps(max_fps)
+
+    def set_max_fps(self, max_fps):
+        self.frame_interval = 1.0 / max(1, max_fps)
+
+    def schedule(self, key, message):
+        """Anahtarlı güncelleme: bekleyen aynı anahtarlı güncellemenin yerine geçer"""
+        self._pending[key] = message
+        self._pending.move_to_end(key)  # Arada gönderilen temizleme vb. mesajlardan sonra işlensin
+        self._arm()
+
+    def append(self, message):
+        """Birleştirilmeyen, sırası korunan güncelleme"""
+        self._pending[('append', next(self._sequence))] = message
+        self._arm()
+
+    def _arm(self):
+        if self._timer.isActive():
+            return
+        elapsed = time.monotonic() - self._last_flush
+        delay = max(0.0, self.frame_interval - elapsed)
+        self._timer.start(int(delay * 1000))
+
+    def flush(self):
+        """Bekleyen tüm güncellemeleri tek bir paket halinde gönder"""
+        self._timer.stop()
+        pending, self._pending = self._pending, OrderedDict()
+        self._last_flush = time.monotonic()
+
+        messages = []
+        for item in pending.values():
+            if callable(item):
+                messages.extend(item() or [])
+            else:
+                messages.append(item)
+        if messages:
+            payload = json.dumps(messages, separators=(',', ':'))
+            metrics.inc('render.pushes')
+            metrics.observe('render.payload_bytes', len(payload))
+            metrics.observe('render.messages', len(messages))
+            self.send(payload)
+
+
+class ConnectivityMonitor(QObject):
+    """İnternet bağlantısını arka planda yoklayan ve durumu önbellekte tutan monitör
+
+    Yoklama adresi MAP_PROBE_URL ortam değişkeniyle değiştirilebilir (ör. sahada
+    yerel bir sunucu). Sunucudan herhangi bir HTTP cevabı gelmesi bağlantı var
+    sayılır. Durum değiştiğinde connectivity_changed sinyali yayılır.
+    """
+    connectivity_changed = Signal(bool)
+
+    DEFAULT_PROBE_URL = 'http://www.google.com'
+
+    def __init__(self, probe_url=None, interval=10.0, timeout=2.0):
+        super().__init__()
+        self.probe_url = probe_url or os.environ.get('MAP_PROBE_URL', self.DEFAULT_PROBE_URL)
+        self.interval = interval
+        self.timeout = timeout
+        self.state = None  # None = henüz yoklanmadı
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread = None
+
+    @property
+    def is_online(self):
+        return bool(self.state)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
     def stop(self):
-        if self.server:
-            self.server.shutdown()
-            self.server.server_close()
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def check_now(self):
+        """Bir sonraki yoklamayı beklemeden hemen yokla"""
+        self._wake_event.set()
+
+    def probe(self):
+        try:
+            urllib.request.urlopen(self.probe_url, timeout=self.timeout).close()
+            return True
+        except urllib.error.HTTPError:
+            return True  # Sunucuya ulaşıldı
+        except Exception:
+            return False
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            online = self.probe()
+            if online != self.state:
+                self.state = online
+                print(f"Bağlantı durumu: {'online' if online else 'offline'}")
+                self.connectivity_changed.emit(online)
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
 
 
 class OfflineManager:
-    def __init__(self):
+    def __init__(self, tile_store_backend=None, probe_url=None):
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
         self.assets_dir = os.path.join(self.base_dir, 'assets')
         self.tiles_dir = os.path.join(self.base_dir, 'tiles', 'satellite')
+        self.mbtiles_path = os.path.join(self.base_dir, 'tiles', 'satellite.mbtiles')
         self.leaflet_dir = os.path.join(self.assets_dir, 'leaflet')
+        self.web_dir = os.path.join(self.base_dir, 'web')
         
-        # Tile server
+        # Tile server (harita sayfası ve Leaflet de buradan /static/ altında serve edilir)
         self.tile_server = None
         self.server_port = 8000
+        self.static_dirs = {'web': self.web_dir, 'leaflet': self.leaflet_dir}
+        self._server_lock = threading.Lock()  # Arka plan yükleyici ve UI aynı anda başlatmasın
+        self._has_offline_tiles = None  # Son sonuç; yalnızca değişince loglanır
         
         # Dizinleri oluştur
         os.makedirs(self.leaflet_dir, exist_ok=True)
         os.makedirs(self.tiles_dir, exist_ok=True)
+        
+        # Tile deposu: 'directory' (z/x/y.png), 'mbtiles' (tek SQLite dosyası) veya
+        # 'dedup' (aynı içerikli tile'ları tek kopya tutan MBTiles).
+        # Belirtilmezse MBTiles dosyası varsa o kullanılır.
+        if tile_store_backend is None:
+            tile_store_backend = os.environ.get('MAP_TILE_STORE')
+        if tile_store_backend is None:
+            tile_store_backend = 'mbtiles' if os.path.exists(self.mbtiles_path) else 'directory'
+        if tile_store_backend in ('mbtiles', 'dedup'):
+            self.tile_store = open_mbtiles(self.mbtiles_path, dedup=tile_store_backend == 'dedup')
+        else:
+            self.tile_store = DirectoryTileStore(self.tiles_dir)
+        
+        # Kalıcı indirme iş kuyruğu
+        self.download_queue = DownloadQueue(os.path.join(self.base_dir, 'tiles', 'download_queue.db'))
+        
+        # Koşullu yenileme için tile ETag/Last-Modified kayıtları
+        self.tile_metadata = TileMetadata(os.path.join(self.base_dir, 'tiles', 'tile_meta.db'))
+        self.tile_revision = 0  # Yenilemeden sonra tarayıcı önbelleğini aşmak için URL'ye eklenir
+        
+        # Arka plan bağlantı monitörü (UI thread'ini bloklamaz)
+        self.connectivity_monitor = ConnectivityMonitor(probe_url)
+        self.connectivity_monitor.start()
     
     def start_tile_server(self):
-        """Yerel tile server'ını başlat"""
-        if not self.tile_server:
-            self.tile_server = TileServer(self.tiles_dir, self.server_port)
-            self.tile_server.start()
-            time.sleep(1)  # Server'ın başlaması için bekle
-            return True
-        return True
+        """Yerel tile server'ını başlat ve dinlemeye başlayana kadar bekle"""
+        with self._server_lock:
+            if not self.tile_server:
+                with startup_profiler.phase('tile_server', 'Tile server hazır'):
+                    self.tile_server = TileServer(self.tile_store, self.server_port, static_dirs=self.static_dirs)
+                    self.tile_server.start()
+                    ready = self.tile_server.wait_ready(TILE_SERVER_START_TIMEOUT)
+                if not ready:
+                    print("Tile server başlatılamadı!")
+                return ready
+            return self.tile_server.wait_ready(0)
+    
+    def invalidate_tiles(self):
+        """Yenilenen tile'ların server ve tarayıcı önbelleklerinden düşmesini sağla"""
+        self.tile_revision += 1
+        if self.tile_server:
+            self.tile_server.tile_cache.clear()
     
     def stop_tile_server(self):
         """Tile server'ını durdur"""
@@ -75,12 +278,8 @@ class OfflineManager:
             self.tile_server = None
     
     def is_internet_available(self):
-        """İnternet bağlantısını kontrol et"""
-        try:
-            urllib.request.urlopen('http://www.google.com', timeout=2)
-            return True
-        except:
-            return False
+        """Önbellekteki bağlantı durumunu döndür (bloklamaz)"""
+        return self.connectivity_monitor.is_online
     
     def download_leaflet_files(self):
         """Leaflet dosyalarını indir ve kaydet"""
@@ -88,8 +287,8 @@ class OfflineManager:
             return False
             
         files_to_download = [
-            ('https://unpkg.com/leaflet@1.9.4/dist/leaflet.js', 'leaflet.js'),
-            ('https://unpkg.com/leaflet@1.9.4/dist/leaflet.css', 'leaflet.css')
+            (f'{LEAFLET_CDN_URL}/leaflet.js', 'leaflet.js'),
+            (f'{LEAFLET_CDN_URL}/leaflet.css', 'leaflet.css')
         ]
         
         try:
@@ -109,173 +308,93 @@ class OfflineManager:
         css_file = os.path.join(self.leaflet_dir, 'leaflet.css')
         return os.path.exists(js_file) and os.path.exists(css_file)
     
-    def get_leaflet_content(self):
-        """Leaflet dosyalarının içeriğini döndür"""
-        # Her zaman önce yerel dosyaları kontrol et
-        if self.leaflet_files_exist():
-            try:
-                js_path = os.path.join(self.leaflet_dir, 'leaflet.js')
-                css_path = os.path.join(self.leaflet_dir, 'leaflet.css')
-                
-                with open(js_path, 'r', encoding='utf-8') as f:
-                    js_content = f.read()
-                with open(css_path, 'r', encoding='utf-8') as f:
-                    css_content = f.read()
-                
-                print("Leaflet yerel dosyalardan yüklendi")
-                return js_content, css_content, True  # True = local content
-            except Exception as e:
-                print(f"Yerel Leaflet okuma hatası: {e}")
-        
-        # Yerel dosya yoksa ve internet varsa, indir
-        if self.is_internet_available():
+    def static_url(self, prefix, filename, versioned=True):
+        """Statik dosyanın adresi: tile server çalışıyorsa HTTP, değilse file://
+
+        versioned=True ise adrese dosyanın değişiklik zamanı/boyutu eklenir; tarayıcı
+        dosyayı değişene kadar sunucuya sormadan önbellekten kullanır.
+        """
+        path = os.path.join(self.static_dirs[prefix], filename)
+        if not (self.tile_server and self.tile_server.wait_ready(0)):
+            return QUrl.fromLocalFile(path).toString()
+        url = f'http://localhost:{self.server_port}/static/{prefix}/{filename}'
+        if versioned:
+            stat = os.stat(path)
+            url += f'?v={stat.st_mtime_ns:x}-{stat.st_size:x}'
+        return url
+    
+    def get_leaflet_urls(self):
+        """Leaflet JS ve CSS adresleri; yerel dosya yoksa indirilir, olmazsa CDN"""
+        if not self.leaflet_files_exist() and self.is_internet_available():
             print("Leaflet indiriliyor...")
-            if self.download_leaflet_files():
-                return self.get_leaflet_content()  # Recursive call after download
+            self.download_leaflet_files()
+        
+        if self.leaflet_files_exist():
+            print("Leaflet yerel dosyalardan yüklenecek")
+            return self.static_url('leaflet', 'leaflet.js'), self.static_url('leaflet', 'leaflet.css')
         
         # Son çare: CDN URL'leri (sadece internet varken çalışır)
         print("CDN'den Leaflet yükleniyor...")
-        return ('https://unpkg.com/leaflet@1.9.4/dist/leaflet.js', 
-               'https://unpkg.com/leaflet@1.9.4/dist/leaflet.css', False)
+        return f'{LEAFLET_CDN_URL}/leaflet.js', f'{LEAFLET_CDN_URL}/leaflet.css'
     
     def has_offline_tiles(self):
         """Offline tile'ların varlığını kontrol et"""
-        # En az bir tile dosyasının varlığını kontrol et
-        for zoom in [14, 15, 16, 17, 18]:
-            zoom_dir = os.path.join(self.tiles_dir, str(zoom))
-            if os.path.exists(zoom_dir):
-                for x_dir in os.listdir(zoom_dir):
-                    x_path = os.path.join(zoom_dir, x_dir)
-                    if os.path.isdir(x_path):
-                        tiles = [f for f in os.listdir(x_path) if f.endswith('.png')]
-                        if tiles:
-                            print(f"Offline tile'lar bulundu: {zoom}/{x_dir}/")
-                            return True
-        print("Hiç offline tile bulunamadı")
-        return False
+        # Manifest'ten kontrol et (dizin taraması yok)
+        manifest = self.tile_store.manifest
+        counts = [(zoom, manifest.count(zoom)) for zoom in [14, 15, 16, 17, 18]]
+        found = next(((zoom, count) for zoom, count in counts if count), None)
+        # Her harita kurulumunda ve bağlantı değişiminde çağrılır; yalnızca sonuç değişince yaz
+        if (found is not None) != self._has_offline_tiles:
+            self._has_offline_tiles = found is not None
+            if found:
+                print(f"Offline tile'lar bulundu: zoom {found[0]}, {found[1]} tile")
+            else:
+                print("Hiç offline tile bulunamadı")
+        return found is not None
 
 
 class TileDownloader(QThread):
+    """Kalıcı indirme kuyruğundaki işleri arka planda işleyen thread
+
+    İş mantığı Qt bağımsız DownloadJobRunner'dadır; bu sınıf onu ayrı thread'de
+    çalıştırıp ilerlemeyi sinyallerle arayüze iletir.
+    """
     progress_updated = Signal(int, int)  # current, total
     download_finished = Signal(str)
     
-    def __init__(self, center_lat, center_lon, radius=800):
+    def __init__(self, download_queue, tile_store=None, max_workers=DEFAULT_MAX_WORKERS, tile_metadata=None):
         super().__init__()
-        self.center_lat = center_lat
-        self.center_lon = center_lon
-        self.radius = radius
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
         self.tiles_dir = os.path.join(self.base_dir, 'tiles', 'satellite')
-        os.makedirs(self.tiles_dir, exist_ok=True)
+        self.tile_store = tile_store if tile_store is not None else DirectoryTileStore(self.tiles_dir)
+        self.runner = DownloadJobRunner(
+            download_queue, self.tile_store, max_workers=max_workers, tile_metadata=tile_metadata,
+            progress_callback=self.progress_updated.emit
+        )
+    
+    @property
+    def attempted_job_ids(self):
+        return self.runner.attempted_job_ids
+    
+    @property
+    def refreshed_count(self):
+        return self.runner.refreshed_count
     
     def deg2num(self, lat_deg, lon_deg, zoom):
         """Koordinatları tile numaralarına çevir"""
-        import math
-        lat_rad = math.radians(lat_deg)
-        n = 2.0 ** zoom
-        xtile = int((lon_deg + 180.0) / 360.0 * n)
-        ytile = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
-        return (xtile, ytile)
+        return deg2num(lat_deg, lon_deg, zoom)
     
     def calculate_tile_bounds(self, lat, lon, radius_m, zoom):
         """Belirli yarıçaptaki tile sınırlarını hesapla"""
-        import math
-        
-        # Yaklaşık 111320 metre = 1 derece (enlem için)
-        meters_per_degree = 111320
-        
-        # Radius'u dereceye çevir
-        lat_offset = radius_m / meters_per_degree
-        lon_offset = radius_m / (meters_per_degree * math.cos(math.radians(lat)))
-        
-        # Sınırları hesapla
-        north = lat + lat_offset
-        south = lat - lat_offset  
-        east = lon + lon_offset
-        west = lon - lon_offset
-        
-        # Tile koordinatlarına çevir (düzeltildi: min/max doğru atanmış)
-        nw_x, nw_y = self.deg2num(north, west, zoom)  # min_x, min_y
-        se_x, se_y = self.deg2num(south, east, zoom)  # max_x, max_y
-        
-        min_x = nw_x
-        min_y = nw_y
-        max_x = se_x
-        max_y = se_y
-        
-        # Eğer min > max olursa (nadir olsa da), düzelt
-        if min_x > max_x:
-            min_x, max_x = max_x, min_x
-        if min_y > max_y:
-            min_y, max_y = max_y, min_y
-        
-        return min_x, min_y, max_x, max_y
+        return calculate_tile_bounds(lat, lon, radius_m, zoom)
+    
+    def stop(self):
+        """Devam eden indirmeyi iptal et (iş kuyrukta kalır)"""
+        self.runner.stop()
     
     def run(self):
-        """Tile indirme işlemini çalıştır"""
-        # Zoom seviyeleri: 14'ten 18'e kadar (sizin belirttiğiniz)
-        zoom_levels = [14, 15, 16, 17, 18]
-        total_tiles = 0
-        downloaded_tiles = 0
-        
-        print(f"Merkez: {self.center_lat}, {self.center_lon}, Yarıçap: {self.radius}m")
-        
-        # Toplam tile sayısını hesapla
-        all_tiles = []
-        for zoom in zoom_levels:
-            min_x, min_y, max_x, max_y = self.calculate_tile_bounds(
-                self.center_lat, self.center_lon, self.radius, zoom
-            )
-            print(f"Zoom {zoom}: x={min_x}-{max_x}, y={min_y}-{max_y}")
-            
-            for x in range(min_x, max_x + 1):
-                for y in range(min_y, max_y + 1):
-                    all_tiles.append((zoom, x, y))
-        
-        total_tiles = len(all_tiles)
-        print(f"Toplam indirilecek tile: {total_tiles}")
-        
-        # Tile'ları indir
-        success_count = 0
-        failed_count = 0
-        
-        for zoom, x, y in all_tiles:
-            try:
-                # Tile klasörünü oluştur
-                tile_dir = os.path.join(self.tiles_dir, str(zoom), str(x))
-                os.makedirs(tile_dir, exist_ok=True)
-                
-                tile_path = os.path.join(tile_dir, f'{y}.png')
-                
-                # Zaten varsa atla
-                if os.path.exists(tile_path):
-                    downloaded_tiles += 1
-                    self.progress_updated.emit(downloaded_tiles, total_tiles)
-                    continue
-                
-                # Tile'ı indir
-                url = f'https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{zoom}/{y}/{x}'
-                
-                response = requests.get(url, timeout=15)
-                if response.status_code == 200:
-                    with open(tile_path, 'wb') as f:
-                        f.write(response.content)
-                    success_count += 1
-                    if success_count % 10 == 0:  # Her 10 başarılı indirmede log
-                        print(f"✅ İndirildi: {success_count}/{total_tiles} tile")
-                else:
-                    failed_count += 1
-                    print(f"❌ Hata {response.status_code}: {zoom}/{x}/{y}")
-                
-                downloaded_tiles += 1
-                self.progress_updated.emit(downloaded_tiles, total_tiles)
-                
-            except Exception as e:
-                failed_count += 1
-                print(f"Tile indirme hatası {zoom}/{x}/{y}: {e}")
-                downloaded_tiles += 1
-                self.progress_updated.emit(downloaded_tiles, total_tiles)
-        
+        """Kuyruktaki bekleyen işleri sırayla indir"""
+        success_count, failed_count, total_tiles = self.runner.run()
         success_msg = f"İndirme tamamlandı: {success_count} başarılı, {failed_count} başarısız, Toplam: {total_tiles}"
         print(success_msg)
         self.download_finished.emit(success_msg)
@@ -283,32 +402,11 @@ class TileDownloader(QThread):
     def find_downloaded_center(self):
         """İndirilen tile'lardan merkez koordinatı hesapla"""
         try:
-            zoom16_path = os.path.join(self.tiles_dir, '16')
-            if not os.path.exists(zoom16_path):
-                return None, None
-            
-            x_dirs = os.listdir(zoom16_path)
-            if not x_dirs:
-                return None, None
-            
-            # İlk tile'ın koordinatını al
-            first_x = int(x_dirs[0])
-            first_x_path = os.path.join(zoom16_path, x_dirs[0])
-            y_files = os.listdir(first_x_path)
-            
-            if not y_files:
+            center = self.tile_store.manifest.coverage_center(16)
+            if not center:
                 return None, None
             
-            first_y = int(y_files[0].replace('.png', ''))
-            
-            # Tile koordinatından gerçek koordinata çevir
-            import math
-            zoom = 16
-            n = 2.0 ** zoom
-            lon_deg = first_x / n * 360.0 - 180.0
-            lat_rad = math.atan(math.sinh(math.pi * (1 - 2 * first_y / n)))
-            lat_deg = math.degrees(lat_rad)
-            
+            lat_deg, lon_deg = center
             print(f"İndirilen tile'dan hesaplanan koordinat: {lat_deg}, {lon_deg}")
             return lat_deg, lon_deg
             
@@ -316,65 +414,230 @@ class TileDownloader(QThread):
             print(f"Koordinat hesaplama hatası: {e}")
             return None, None
 
+class ContactTrackManager:
+    """Düşman temaslarını ID ile takip eden yönetici
+
+    Her temas için son konum ve son görülme zamanı tutulur. Harita tarafına
+    gönderilmemiş değişiklikler (güncellenen ve silinen ID'ler) biriktirilir ve
+    take_changes() ile tek seferde alınır.
+    """
+    def __init__(self, stale_after=CONTACT_STALE_SECONDS):
+        self.stale_after = stale_after
+        self.contacts = {}  # contact_id -> (lat, lon, last_seen)
+        self._dirty = set()
+        self._removed = set()
+
+    def update(self, contact_id, latitude, longitude, timestamp=None):
+        self.contacts[contact_id] = (latitude, longitude, timestamp if timestamp is not None else time.monotonic())
+        self._dirty.add(contact_id)
+        self._removed.discard(contact_id)
+
+    def remove(self, contact_id):
+        if self.contacts.pop(contact_id, None) is not None:
+            self._dirty.discard(contact_id)
+            self._removed.add(contact_id)
+
+    def expire(self, now=None):
+        """stale_after süresince güncellenmeyen temasları sil, silinen ID'leri döndür"""
+        now = now if now is not None else time.monotonic()
+        stale = [cid for cid, (_, _, seen) in self.contacts.items() if now - seen > self.stale_after]
+        for contact_id in stale:
+            self.remove(contact_id)
+        return stale
+
+    def mark_all_dirty(self):
+        """Harita yeniden kurulduğunda tüm temasların tekrar gönderilmesi için"""
+        self._dirty = set(self.contacts)
+        self._removed.clear()
+
+    def has_changes(self):
+        return bool(self._dirty or self._removed)
+
+    def take_changes(self):
+        """(güncellenen [[id, lat, lon], ...], silinen [id, ...]) döndür ve sıfırla"""
+        updated = [[cid, self.contacts[cid][0], self.contacts[cid][1]] for cid in self._dirty]
+        removed = list(self._removed)
+        self._dirty = set()
+        self._removed = set()
+        return updated, removed
+
+
+class GeofenceMonitor(QObject):
+    """Araç konumunu bölge indeksine karşı kontrol edip giriş/çıkışta sinyal yayar"""
+    zone_entered = Signal(str, str)  # zone_id, tür ('circle' / 'polygon')
+    zone_exited = Signal(str, str)
+
+    def __init__(self):
+        super().__init__()
+        self.index = GeofenceIndex()
+        self.inside = set()
+
+    def add_circle(self, zone_id, latitude, longitude, radius_m):
+        self.index.add_circle(zone_id, latitude, longitude, radius_m)
+
+    def add_polygon(self, zone_id, coordinates):
+        self.index.add_polygon(zone_id, coordinates)
+
+    def remove(self, zone_id):
+        self.index.remove(zone_id)
+        if zone_id in self.inside:
+            self.inside.discard(zone_id)
+
+    def check(self, latitude, longitude):
+        """Konumu kontrol et; içinde bulunulan bölge ID'lerini döndür"""
+        current = self.index.query(latitude, longitude)
+        if current != self.inside:
+            for zone_id in current - self.inside:
+                self.zone_entered.emit(zone_id, self.index.kind(zone_id))
+            for zone_id in self.inside - current:
+                kind = self.index.kind(zone_id)
+                self.zone_exited.emit(zone_id, kind or '')
+            self.inside = current
+        return current
+
+
+class MapLoader(QObject):
+    """Harita sayfasının ihtiyaç duyduğu yavaş işleri arka plan thread'inde hazırlar
+
+    Tile server'ın başlatılması, Leaflet dosyalarının indirilmesi ve tile deposu
+    özeti UI thread'ini bloklamaz; sonuç map_prepared sinyaliyle UI
+    thread'ine iletilir. Üst üste gelen yüklemelerde yalnızca sonuncusu kullanılır.
+    """
+    map_prepared = Signal(object)
+
+    def __init__(self, map_handler):
+        super().__init__()
+        self.map_handler = map_handler
+        self.generation = 0
+
+    def load(self, latitude, longitude):
+        self.generation += 1
+        threading.Thread(
+            target=self._run, args=(self.generation, latitude, longitude), name='map-loader', daemon=True
+        ).start()
+
+    def _run(self, generation, latitude, longitude):
+        try:
+            prepared = self._prepare(generation, latitude, longitude)
+        except Exception as e:
+            # Sinyal yine de gönderilir; aksi halde map_loading takılı kalır ve pencere boş kalır
+            print(f"Harita hazırlanamadı, yedek ayarlarla açılıyor: {e}")
+            prepared = self._fallback(generation, latitude, longitude)
+        self.map_prepared.emit(prepared)
+
+    def _fallback(self, generation, latitude, longitude):
+        """Tile server'a ve ağ kontrollerine dayanmayan sayfa ayarları (file:// ve CDN)"""
+        offline_manager = self.map_handler.offline_manager
+        if offline_manager.leaflet_files_exist():
+            leaflet_js, leaflet_css = (
+                QUrl.fromLocalFile(os.path.join(offline_manager.leaflet_dir, name)).toString()
+                for name in ('leaflet.js', 'leaflet.css')
+            )
+        else:
+            leaflet_js, leaflet_css = f'{LEAFLET_CDN_URL}/leaflet.js', f'{LEAFLET_CDN_URL}/leaflet.css'
+        return {
+            'generation': generation,
+            'latitude': latitude,
+            'longitude': longitude,
+            'tile_url': ARCGIS_TILE_URL,
+            'online': None,  # Bilinmiyor; kaynak bir sonraki bağlantı değişiminde yeniden seçilir
+            'leaflet': {'js': leaflet_js, 'css': leaflet_css},
+            'page_url': QUrl.fromLocalFile(os.path.join(offline_manager.web_dir, 'map.html')).toString(),
+        }
+
+    def _prepare(self, generation, latitude, longitude):
+        offline_manager = self.map_handler.offline_manager
+        # Harita sayfası ve Leaflet de yerel server'dan gelir
+        offline_manager.start_tile_server()
+        with startup_profiler.phase('leaflet', 'Leaflet dosyaları'):
+            leaflet_js, leaflet_css = offline_manager.get_leaflet_urls()
+        with startup_profiler.phase('tile_source', 'Tile kaynağı seçimi'):
+            online = offline_manager.is_internet_available()
+            tile_url = self.map_handler.get_tile_url_template()
+        
+        # Eğer offline tile'lar varsa, onların merkez koordinatını kullan
+        if not online and offline_manager.has_offline_tiles():
+            latitude, longitude = self.map_handler.get_available_tile_center()
+        
+        return {
+            'generation': generation,
+            'latitude': latitude,
+            'longitude': longitude,
+            'tile_url': tile_url,
+            'online': online,
+            'leaflet': {'js': leaflet_js, 'css': leaflet_css},
+            'page_url': offline_manager.static_url('web', 'map.html', versioned=False),
+        }
+
+
 class MapHandler:
-    def __init__(self, web_view: QWebEngineView, main_window):
+    def __init__(self, web_view: QWebEngineView, main_window, max_fps=DEFAULT_RENDER_FPS, render_mode=None):
         self.web_view = web_view
         self.main_window = main_window
+        # Harita katmanlarının çizim modu; MAP_RENDER_MODE ortam değişkeniyle de seçilebilir
+        self.render_mode = render_mode or os.environ.get('MAP_RENDER_MODE', DEFAULT_RENDER_MODE)
+        if self.render_mode not in RENDER_MODES:
+            print(f"Geçersiz render modu '{self.render_mode}', {DEFAULT_RENDER_MODE} kullanılıyor")
+            self.render_mode = DEFAULT_RENDER_MODE
         self.map_initialized = False
         self.waypoints = []
         self.flight_route = []
+        self.route_rendered_count = 0  # JS tarafına gönderilmiş rota noktası sayısı
         self.is_waypoint_creation_active = False
-        self.restricted_areas = []
-        self.enemy_drones = []
+        self.restricted_areas = []  # (zone_id, lat, lon, radius)
+        self.flight_areas = []  # (zone_id, coordinates)
+        self.contact_tracks = ContactTrackManager()
+        self.enemy_drones = self.contact_tracks.contacts  # contact_id -> (lat, lon, last_seen)
+        self._contact_sequence = itertools.count(1)
         
         # Offline manager
-        self.offline_manager = OfflineManager()
+        with startup_profiler.phase('offline_manager', 'Tile deposu ve indirme kuyruğu'):
+            self.offline_manager = OfflineManager()
+        self.tile_downloader = None
         
         # Web channel setup
         self.web_channel = QWebChannel()
         self.event_handler = MapEventHandler()
         self.web_channel.registerObject("pyObj", self.event_handler)
         self.web_view.page().setWebChannel(self.web_channel)
+        
+        # Harita güncellemelerini birleştirip kare hızıyla sayfaya gönderen zamanlayıcı
+        self.render_scheduler = RenderScheduler(self.event_handler.renderMessages.emit, max_fps)
+        self.last_flight_state = None  # (lat, lon, yaw)
+        
+        # Yasaklı alan / uçuş alanı kontrolü
+        self.geofence = GeofenceMonitor()
+        self.geofence.zone_entered.connect(self.handle_zone_entered)
+        self.geofence.zone_exited.connect(self.handle_zone_exited)
+        self._zone_sequence = itertools.count(1)
+        
+        # Eskiyen temasları periyodik olarak temizle
+        self.contact_expiry_timer = QTimer()
+        self.contact_expiry_timer.timeout.connect(self.expire_stale_contacts)
+        self.contact_expiry_timer.start(1000)
 
         # Event handler sinyallerine bağlan
         self.event_handler.coordinates_received.connect(self.handle_map_click)
         self.event_handler.right_click_received.connect(self.handle_right_click)
+        self.event_handler.map_ready.connect(self.handle_map_ready)
+        
+        # Bağlantı değişince tile kaynağını değiştir
+        self.offline_manager.connectivity_monitor.connectivity_changed.connect(self.handle_connectivity_changed)
+
+        # Harita arka planda hazırlanır; pencere bu sırada açılır
+        self.map_loading = False
+        self.map_loader = MapLoader(self)
+        self.map_loader.map_prepared.connect(self.build_map)
 
         # Varsayılan koordinatlarla başlat
-        self.update_map(37.951, 32.500)
+        self.update_map(*DEFAULT_CENTER)
 
-    def get_base64_icon(self):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(base_dir, 'uav2.svg')
-        try:
-            with open(file_path, 'r') as file:
-                svg_data = file.read()
-            return base64.b64encode(svg_data.encode()).decode()
-        except FileNotFoundError:
-            print(f"Error: 'uav2.svg' not found in {base_dir}")
-            return ""
-
-    def get_base64_waypoint_icon(self):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(base_dir, 'waypoint.svg')
-        try:
-            with open(file_path, 'r') as file:
-                svg_data = file.read()
-            return base64.b64encode(svg_data.encode()).decode()
-        except FileNotFoundError:
-            print(f"Error: 'waypoint.svg' not found in {base_dir}")
-            return ""
-
-    def get_base64_enemy_icon(self):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(base_dir, 'enemy_drone.svg')
-        try:
-            with open(file_path, 'r') as file:
-                svg_data = file.read()
-            return base64.b64encode(svg_data.encode()).decode()
-        except FileNotFoundError:
-            print(f"Error: 'enemy_drone.svg' not found in {base_dir}")
-            return ""
+    def get_local_tile_url(self):
+        """Yerel tile server URL şablonu (yenilemeden sonra sürüm parametresiyle)"""
+        url = f'http://localhost:{self.offline_manager.server_port}/{{z}}/{{x}}/{{y}}.png'
+        if self.offline_manager.tile_revision:
+            url += f'?v={self.offline_manager.tile_revision}'
+        return url
 
     def get_tile_url_template(self):
         """Tile URL şablonunu döndür (online/offline)"""
@@ -386,170 +649,121 @@ class MapHandler:
             # Offline mod - yerel HTTP server kullan
             print("Offline mode: Local HTTP server")
             self.offline_manager.start_tile_server()
-            return f'http://localhost:{self.offline_manager.server_port}/{{z}}/{{x}}/{{y}}.png'
+            return self.get_local_tile_url()
         elif has_internet:
             # Online mod - internet var
             print("Online mode: ArcGIS tiles")
-            return 'https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}'
+            return ARCGIS_TILE_URL
         else:
             # Ne offline tile var ne internet - fallback HTTP server
             print("Fallback mode: Local HTTP server (may not exist)")
             self.offline_manager.start_tile_server()
-            return f'http://localhost:{self.offline_manager.server_port}/{{z}}/{{x}}/{{y}}.png'
+            return self.get_local_tile_url()
 
     def get_available_tile_center(self):
         """Mevcut offline tile'lardan merkez koordinat bul"""
         try:
-            # Zoom 16'dan başla (en detaylı)
-            zoom16_path = os.path.join(self.offline_manager.tiles_dir, '16')
-            if os.path.exists(zoom16_path):
-                x_dirs = [d for d in os.listdir(zoom16_path) if os.path.isdir(os.path.join(zoom16_path, d))]
-                if x_dirs:
-                    # İlk x klasöründen bir tile al
-                    first_x = int(x_dirs[0])
-                    first_x_path = os.path.join(zoom16_path, x_dirs[0])
-                    y_files = [f for f in os.listdir(first_x_path) if f.endswith('.png')]
-                    
-                    if y_files:
-                        first_y = int(y_files[0].replace('.png', ''))
-                        
-                        # Tile koordinatından lat/lon'a çevir
-                        import math
-                        zoom = 16
-                        n = 2.0 ** zoom
-                        lon_deg = first_x / n * 360.0 - 180.0
-                        lat_rad = math.atan(math.sinh(math.pi * (1 - 2 * first_y / n)))
-                        lat_deg = math.degrees(lat_rad)
-                        
-                        print(f"Offline tile merkezi bulundu: {lat_deg}, {lon_deg}")
-                        return lat_deg, lon_deg
+            # Manifest'teki zoom 16 kapsamasının merkezi
+            center = self.offline_manager.tile_store.manifest.coverage_center(16)
+            if center:
+                lat_deg, lon_deg = center
+                print(f"Offline tile merkezi bulundu: {lat_deg}, {lon_deg}")
+                return lat_deg, lon_deg
         except Exception as e:
             print(f"Offline tile merkezi bulunamadı: {e}")
         
         # Varsayılan koordinatlar
-        return 37.951, 32.500
+        return DEFAULT_CENTER
 
     def update_map(self, latitude, longitude):
-        # Leaflet içeriğini al
-        js_content, css_content, is_local = self.offline_manager.get_leaflet_content()
-        tile_url = self.get_tile_url_template()
+        """Haritayı (yeniden) kur; Leaflet, tile kaynağı ve merkez arka planda hazırlanır"""
+        self.map_loading = True
+        self.map_loader.load(latitude, longitude)
+
+    def build_map(self, prepared):
+        """Arka planda hazırlanan bilgilerle harita sayfasını kur (UI thread'inde)"""
+        if prepared['generation'] != self.map_loader.generation:
+            return  # Bu sırada daha yeni bir yükleme başlatıldı
+        with startup_profiler.phase('map_page', 'Harita sayfası oluşturma'):
+            self._build_map_page(prepared)
+        self.map_loading = False
         
-        # Eğer offline tile'lar varsa, onların merkez koordinatını kullan
-        if not self.offline_manager.is_internet_available() and self.offline_manager.has_offline_tiles():
-            center_lat, center_lon = self.get_available_tile_center()
-            latitude, longitude = center_lat, center_lon
+        # Hazırlık sırasında bağlantı durumu değiştiyse tile kaynağını güncelle
+        # (yedek ayarlarda durum bilinmez; aynı hatayı UI thread'inde tekrarlama)
+        online = prepared['online']
+        if online is not None and online != self.offline_manager.is_internet_available():
+            self.switch_tile_source()
+
+    def _build_map_page(self, prepared):
+        tile_url = prepared['tile_url']
+        latitude, longitude = prepared['latitude'], prepared['longitude']
         
         print(f"Tile URL template: {tile_url}")
         print(f"Harita merkezi: {latitude}, {longitude}")
         
-        marker_script = f"""
-        console.log('Harita başlatılıyor...');
-        console.log('Tile URL: {tile_url}');
+        # Sayfa statiktir (web/map.html); ayarları QWebChannel üzerinden bir kez okur
+        config = {
+            'center': [latitude, longitude],
+            'zoom': 16,
+            'minZoom': 14,
+            'maxZoom': MAX_DISPLAY_ZOOM,
+            'tileUrl': tile_url,
+            'routeChunkSize': ROUTE_CHUNK_SIZE,
+            'renderMode': self.render_mode,
+            'leaflet': prepared['leaflet'],
+            # İkonlar bir kez kaydedilir; güncellemeler ikonlara adıyla başvurur
+            'icons': {
+                'uav': f'data:image/svg+xml;base64,{load_base64_icon("uav2.svg")}',
+                'waypoint': f'data:image/svg+xml;base64,{load_base64_icon("waypoint.svg")}',
+                'enemy': f'data:image/svg+xml;base64,{load_base64_icon("enemy_drone.svg")}',
+            },
+        }
+        self.event_handler.map_config = json.dumps(config)
         
-        var map = L.map('map').setView([{latitude}, {longitude}], 16);
-    
-        // Uydu görünümü katmanı (dinamik URL)
-        var satelliteLayer = L.tileLayer('{tile_url}', {{
-            attribution: 'Tiles &copy; Esri',
-            maxZoom: 18,
-            minZoom: 14,
-            errorTileUrl: 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAQAAAAEACAYAAABccqhmAAAABHNCSVQICAgIfAhkiAAAAAlwSFlzAAAN1wAADdcBQiibeAAAABl0RVh0U29mdHdhcmUAd3d3Lmlua3NjYXBlLm9yZ5vuPBoAAANbSURBVHic7doxAQAACMOwgX+TaWfBDyZAXOvdAeBNAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUg7AcAAAD//2Q9CQMAAAAZdEVYdENvbW1lbnQAQ3JlYXRlZCB3aXRoIEdJTVBkLmUHAAAAAElFTkSuQmCC'  // Boş gri tile
-        }});
-    
-        satelliteLayer.addTo(map);
-        console.log('Satellite layer eklendi');
-    
-        window.map = map;
-    
-        // Test için bir tile yüklenip yüklenmediğini kontrol et
-        satelliteLayer.on('tileload', function(e) {{
-            console.log('Tile yüklendi: ' + e.url);
-        }});
-        
-        satelliteLayer.on('tileerror', function(e) {{
-            console.log('Tile hatası: ' + e.tile.src);
-        }});
-    
-        // Sağ tıklama olayını dinle
-        map.on('contextmenu', function(e) {{
-            var coord = e.latlng;
-            var lat = coord.lat;
-            var lng = coord.lng;
-            pyObj.rightClickReceived(lat, lng);
-        }});
-    
-        // Tıklama olayını dinle
-        map.on('click', function(e) {{
-            var coord = e.latlng;
-            var lat = coord.lat;
-            var lng = coord.lng;
-            pyObj.coordinatesClicked(lat, lng);
-        }});
-    
-        // Önceki rotaları temizle
-        if (window.waypointLayer) {{
-            map.removeLayer(window.waypointLayer);
-        }}
-        if (window.flightRouteLayer) {{
-            map.removeLayer(window.flightRouteLayer);
-        }}
-        
-        console.log('Harita hazır!');
-        """
-
         if not self.map_initialized:
-            # HTML oluştur
-            if is_local:
-                # Yerel içerik - doğrudan HTML'e embed et
-                map_html = f"""
-                <html>
-                <head>
-                    <title>Offline Map</title>
-                    <style>{css_content}</style>
-                    <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
-                </head>
-                <body>
-                    <div id="map" style="width: 100%; height: 100%;"></div>
-                    <script>{js_content}</script>
-                    <script>
-                        new QWebChannel(qt.webChannelTransport, function(channel) {{
-                            window.pyObj = channel.objects.pyObj;
-                            // Leaflet yüklendikten sonra haritayı başlat
-                            {marker_script}
-                        }});
-                    </script>
-                </body>
-                </html>
-                """
-            else:
-                # CDN - normal script/link tag'leri
-                map_html = f"""
-                <html>
-                <head>
-                    <title>Offline Map</title>
-                    <script src="{js_content}"></script>
-                    <link rel="stylesheet" href="{css_content}"/>
-                    <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
-                </head>
-                <body>
-                    <div id="map" style="width: 100%; height: 100%;"></div>
-                    <script>
-                        new QWebChannel(qt.webChannelTransport, function(channel) {{
-                            window.pyObj = channel.objects.pyObj;
-                            // CDN yüklenme süresini bekle
-                            setTimeout(function() {{
-                                {marker_script}
-                            }}, 500);
-                        }});
-                    </script>
-                </body>
-                </html>
-                """
-                
-            self.web_view.setHtml(map_html)
+            self.web_view.setUrl(QUrl(prepared['page_url']))
             self.map_initialized = True
         else:
-            self.web_view.page().runJavaScript(marker_script)
+            # Sayfa zaten yüklü: yeniden yüklemeden merkezi ve tile kaynağını değiştir
+            view = {key: config[key] for key in ('center', 'zoom', 'tileUrl')}
+            self.render_scheduler.schedule('config', ['config', view])
+
+    def handle_map_ready(self):
+        """Sayfadaki harita kurulduğunda (ilk seferinde başlangıç raporunu bas)"""
+        startup_profiler.mark('map_ready', 'Harita hazır')
+        startup_profiler.report()
+        
+        # Yeni sayfa boş başlar: tüm katmanlar baştan gönderilir
+        for zone_id, latitude, longitude, radius in self.restricted_areas:
+            self.render_scheduler.append(['restrictedArea', zone_id, latitude, longitude, radius])
+        for zone_id, coordinates in self.flight_areas:
+            self.render_scheduler.append(['flightArea', zone_id, coordinates])
+        if len(self.waypoints) >= 2:
+            self.update_waypoints()
+        for number, (latitude, longitude) in enumerate(self.waypoints, 1):
+            self.render_scheduler.append(['waypointAdd', latitude, longitude, number])
+        self.route_rendered_count = 0
+        if self.flight_route:
+            self.update_flight_route()
+        if self.last_flight_state is not None:
+            self.render_scheduler.schedule('flight_marker', self.build_last_flight_marker)
+        if self.contact_tracks.contacts:
+            self.contact_tracks.mark_all_dirty()
+            self.render_scheduler.schedule('contacts', self.build_contact_messages)
+
+    def handle_connectivity_changed(self, online):
+        """Bağlantı durumu değiştiğinde haritayı yeniden kurmadan tile kaynağını değiştir"""
+        if online:
+            # Yarım kalan indirme işlerine devam et
+            self.start_downloads()
+        if self.map_initialized:
+            self.switch_tile_source()
+
+    def switch_tile_source(self):
+        """Haritayı yeniden kurmadan tile katmanının adresini değiştir"""
+        tile_url = self.get_tile_url_template()
+        print(f"Tile kaynağı değiştiriliyor: {tile_url}")
+        self.render_scheduler.schedule('tile_source', ['tileUrl', tile_url])
 
     def handle_map_click(self, latitude, longitude):
         if self.is_waypoint_creation_active:
@@ -567,6 +781,9 @@ class MapHandler:
 
         menu = QMenu()
         download_area_action = menu.addAction("Bu Bölgeyi İndir (800m)")
+        refresh_area_action = menu.addAction("Bu Bölgeyi Güncelle (800m)")
+        download_route_action = menu.addAction(f"Rota Boyunca İndir ({CORRIDOR_BUFFER_M}m)")
+        download_flight_areas_action = menu.addAction("Uçuş Alanlarını İndir")
         start_waypoint_action = menu.addAction("Waypoint Oluştur")
         stop_waypoint_action = menu.addAction("Waypoint Oluşturmayı Bitir")
         save_waypoints_action = menu.addAction("Waypoint'leri Kaydet")
@@ -577,6 +794,12 @@ class MapHandler:
 
         if action == download_area_action:
             self.download_area(latitude, longitude)
+        elif action == refresh_area_action:
+            self.refresh_area(latitude, longitude)
+        elif action == download_route_action:
+            self.download_route()
+        elif action == download_flight_areas_action:
+            self.download_flight_areas()
         elif action == start_waypoint_action:
             self.is_waypoint_creation_active = True
             self.waypoints = []
@@ -594,19 +817,61 @@ class MapHandler:
             self.clear_flight_route()
             print("Rota izleri temizlendi.")
 
-    def download_area(self, latitude, longitude):
-        """Belirli bölgeyi indir"""
+    def download_area(self, latitude, longitude, radius=800):
+        """Belirli bölgeyi indirme kuyruğuna ekle"""
+        region = {'type': 'circle', 'lat': latitude, 'lon': longitude, 'radius': radius}
+        self.enqueue_region(f"{latitude:.5f}, {longitude:.5f} ({radius}m)", region)
+
+    def download_route(self, buffer_m=CORRIDOR_BUFFER_M):
+        """Waypoint rotası boyunca buffer_m genişliğindeki koridoru indirme kuyruğuna ekle"""
+        if not self.waypoints:
+            print("İndirilecek rota yok! Önce waypoint ekleyin.")
+            return
+        region = {'type': 'corridor', 'points': [list(point) for point in self.waypoints], 'buffer': buffer_m}
+        self.enqueue_region(f"Rota koridoru ({len(self.waypoints)} waypoint, {buffer_m}m)", region)
+
+    def download_flight_areas(self):
+        """Tanımlı uçuş alanı poligonlarını indirme kuyruğuna ekle"""
+        if not self.flight_areas:
+            print("İndirilecek uçuş alanı yok!")
+            return
+        for zone_id, coordinates in self.flight_areas:
+            region = {'type': 'polygon', 'points': [list(point) for point in coordinates]}
+            self.enqueue_region(f"Uçuş alanı {zone_id}", region)
+
+    def refresh_area(self, latitude, longitude, radius=800):
+        """İndirilmiş bölgeyi kaynakta değişen tile'lar için yenile"""
+        region = {'type': 'circle', 'lat': latitude, 'lon': longitude, 'radius': radius}
+        self.enqueue_region(f"Yenileme {latitude:.5f}, {longitude:.5f} ({radius}m)", region, refresh=True)
+
+    def enqueue_region(self, name, region, refresh=False):
+        """Bölgeyi kapsayan tile'ları planla ve kuyruğa ekle"""
+        job_id, fetch_count, derived_count = enqueue_region(
+            self.offline_manager.download_queue, name, region, DOWNLOAD_ZOOM_LEVELS, refresh=refresh
+        )
+        print(f"Bölge kuyruğa eklendi (iş #{job_id}): {name}, {fetch_count} tile indirilecek, {derived_count} tile üretilecek")
+        
         if not self.offline_manager.is_internet_available():
-            print("İnternet bağlantısı yok! İndirme yapılamıyor.")
+            print("İnternet bağlantısı yok! İndirme bağlantı gelince başlayacak.")
+            self.offline_manager.connectivity_monitor.check_now()
             return
         
-        print(f"Bölge indiriliyor: {latitude}, {longitude} (800m yarıçap)")
+        self.start_downloads()
+
+    def start_downloads(self):
+        """Kuyruktaki işleri işlemek için downloader'ı başlat (çalışıyorsa yeni işleri kendisi alır)"""
+        if self.tile_downloader and self.tile_downloader.isRunning():
+            return
+        if self.offline_manager.download_queue.next_job() is None:
+            return
         
         # Progress bar göster
         self.main_window.show_progress_bar()
         
-        # Tile downloader'ı başlat (800m yarıçap)
-        self.tile_downloader = TileDownloader(latitude, longitude, 800)
+        self.tile_downloader = TileDownloader(
+            self.offline_manager.download_queue, self.offline_manager.tile_store,
+            tile_metadata=self.offline_manager.tile_metadata
+        )
         self.tile_downloader.progress_updated.connect(self.main_window.update_progress)
         self.tile_downloader.download_finished.connect(self.download_completed)
         self.tile_downloader.start()
@@ -616,50 +881,29 @@ class MapHandler:
         print(message)
         self.main_window.hide_progress_bar()
         
-        # Haritayı yenile (offline tile'ları kullanmaya başlamak için)
-        self.map_initialized = False
+        if self.tile_downloader.refreshed_count:
+            print(f"{self.tile_downloader.refreshed_count} tile güncellendi, önbellekler temizleniyor")
+            self.offline_manager.invalidate_tiles()
+        
+        # Çalışma bitmeden kuyruğa eklenen işler kaldıysa devam et
+        attempted = self.tile_downloader.attempted_job_ids
+        if self.offline_manager.download_queue.next_job(exclude=attempted) is not None:
+            self.tile_downloader.wait()
+            self.start_downloads()
+        
+        # Haritayı yenile (offline tile'ları kullanmaya başlamak için); sayfa
+        # yüklüyse yeniden yüklenmez, yalnızca merkez ve tile kaynağı değişir
         center_lat, center_lon = self.get_available_tile_center()
         self.update_map(center_lat, center_lon)
 
     def clear_waypoints(self):
         self.waypoints.clear()
-        clear_waypoints_script = """
-        if (window.waypointLayer) {
-            window.map.removeLayer(window.waypointLayer);
-            window.waypointLayer = null;
-        }
-        if (window.waypointMarker) {
-            window.map.removeLayer(window.waypointMarker);
-            window.waypointMarker = null;
-        }
-        if (window.waypointNumbers && window.waypointNumbers.length > 0) {
-            window.waypointNumbers.forEach(function(marker) {
-                window.map.removeLayer(marker);
-            });
-            window.waypointNumbers = [];
-        }
-        window.map.eachLayer(function(layer) {
-            if (layer instanceof L.Marker && layer.options.icon instanceof L.DivIcon) {
-                var html = layer.options.icon.options.html;
-                if (html && html.includes('FFA500')) {
-                    window.map.removeLayer(layer);
-                }
-            }
-        });
-        console.log('Tüm waypointler ve numaraları temizlendi.');
-        """
-        self.web_view.page().runJavaScript(clear_waypoints_script)
+        self.render_scheduler.append(['waypointsClear'])
 
     def clear_flight_route(self):
         self.flight_route.clear()
-        clear_route_script = """
-        if (window.flightRouteLayer) {
-            window.map.removeLayer(window.flightRouteLayer);
-            window.flightRouteLayer = null;
-        }
-        console.log('Uçuş rota izleri temizlendi.');
-        """
-        self.web_view.page().runJavaScript(clear_route_script)
+        self.route_rendered_count = 0
+        self.render_scheduler.append(['routeClear'])
 
     def save_waypoints_to_file(self):
         if not self.waypoints:
@@ -678,129 +922,134 @@ class MapHandler:
     def update_waypoints(self):
         if len(self.waypoints) < 2:
             return
-        waypoint_script = f"""
-        if (window.waypointLayer) {{
-            window.map.removeLayer(window.waypointLayer);
-        }}
-        window.waypointLayer = L.polyline({self.waypoints}, {{
-            color: '#FFD700',
-            weight: 4,
-            opacity: 0.8,
-            dashArray: '10, 5'
-        }}).addTo(window.map);
-        """
-        self.web_view.page().runJavaScript(waypoint_script)
+        self.render_scheduler.schedule('waypoint_route', self.build_waypoint_route)
+
+    def build_waypoint_route(self):
+        """Waypoint çizgisi; aynı karedeki eklemeler tek mesajda birleşir"""
+        if len(self.waypoints) < 2:
+            return []
+        return [['waypointRoute', list(self.waypoints)]]
 
     def update_last_waypoint_marker(self, latitude, longitude):
-        waypoint_icon = f"data:image/svg+xml;base64,{self.get_base64_waypoint_icon()}"
-        waypoint_number = len(self.waypoints)
-        
-        last_waypoint_script = f"""
-        if (window.waypointMarker) {{
-            window.map.removeLayer(window.waypointMarker);
-        }}
-        if (!window.waypointNumbers) {{
-            window.waypointNumbers = [];
-        }}
-        window.waypointMarker = L.marker([{latitude}, {longitude}], {{
-            icon: L.icon({{
-                iconUrl: '{waypoint_icon}',
-                iconSize: [25, 25]
-            }})
-        }}).addTo(window.map);
-        var numberMarker = L.marker([{latitude}, {longitude}], {{
-            icon: L.divIcon({{
-                html: '<div style="background: #FFA500; color: white; border-radius: 50%; width: 20px; height: 20px; display: flex; align-items: center; justify-content: center; font-weight: bold; font-size: 12px; border: 2px solid white;">{waypoint_number}</div>',
-                className: '',
-                iconSize: [20, 20],
-                iconAnchor: [10, 10]
-            }})
-        }}).addTo(window.map);
-        window.waypointNumbers.push(numberMarker);
-        """
-        self.web_view.page().runJavaScript(last_waypoint_script)
+        self.render_scheduler.append(['waypointAdd', latitude, longitude, len(self.waypoints)])
 
     def update_marker(self, latitude, longitude, yaw):
+        # Bölge giriş/çıkış kontrolü (grid indeksi ile)
+        self.geofence.check(latitude, longitude)
+        
         if self.map_initialized:
+            # Güncellemeler bir sonraki karede tek paket halinde gönderilir
             self.flight_route.append([latitude, longitude])
             self.update_flight_route()
             self.update_last_flight_marker(latitude, longitude, yaw)
-        else:
+        elif not self.map_loading:
             self.update_map(37.951560201667846, 32.50058144330979)
-            self.map_initialized = True
 
     def update_flight_route(self):
-        if len(self.flight_route) < 2:
-            return
-        flight_route_script = f"""
-        if (window.flightRouteLayer) {{
-            window.map.removeLayer(window.flightRouteLayer);
-        }}
-        window.flightRouteLayer = L.polyline({self.flight_route}, {{
-            color: '#32CD32',
-            weight: 3,
-            opacity: 1.0
-        }}).addTo(window.map);
-        """
-        self.web_view.page().runJavaScript(flight_route_script)
+        """Rota güncellemesini bir sonraki kareye planla"""
+        self.render_scheduler.schedule('flight_route', self.build_flight_route_messages)
+
+    def build_flight_route_messages(self):
+        """Rotaya yalnızca henüz gönderilmemiş noktaları ekleyen mesaj"""
+        new_points = self.flight_route[self.route_rendered_count:]
+        if not new_points:
+            return []
+        self.route_rendered_count = len(self.flight_route)
+        return [['routeAppend', new_points]]
+
+    def rebuild_flight_route(self):
+        """Rota katmanını silip tüm rotayı baştan çiz (açık sıfırlama)"""
+        self.render_scheduler.append(['routeClear'])
+        self.route_rendered_count = 0
+        self.update_flight_route()
 
     def update_last_flight_marker(self, latitude, longitude, yaw):
-        uav_icon = f"data:image/svg+xml;base64,{self.get_base64_icon()}"
-        last_flight_script = f"""
-        if (window.flightMarker) {{
-            window.map.removeLayer(window.flightMarker);
-        }}
-        window.flightMarker = L.marker([{latitude}, {longitude}], {{
-            icon: L.divIcon({{
-                html: `<div style="transform: rotate({yaw}deg); filter: hue-rotate(200deg);"><img src='{uav_icon}' style='width: 25px; height: 25px;'></div>`,
-                className: '',
-                iconSize: [25, 25],
-                iconAnchor: [12.5, 12.5]
-            }})
-        }}).addTo(window.map);
-        """
-        self.web_view.page().runJavaScript(last_flight_script)
-
-    def update_restricted_area_marker(self, latitude, longitude, radius):
-        restricted_area_script = f"""
-        var circle = L.circle([{latitude}, {longitude}], {{
-            color: '#FF0000',
-            fillColor: '#FF0000',
-            fillOpacity: 0.15,
-            weight: 3,
-            radius: {radius}
-        }}).addTo(window.map);
-        """
-        self.web_view.page().runJavaScript(restricted_area_script)
-
-    def update_enemy_drone_marker(self, latitude, longitude):
-        enemy_drone_icon = f"data:image/svg+xml;base64,{self.get_base64_enemy_icon()}"
-        enemy_drone_script = f"""
-        var marker = L.marker([{latitude}, {longitude}], {{
-            icon: L.icon({{
-                iconUrl: '{enemy_drone_icon}',
-                iconSize: [25, 25]
-            }})
-        }}).addTo(window.map);
-        """
-        self.web_view.page().runJavaScript(enemy_drone_script)
-
-    def update_flight_area_marker(self, coordinates):
-        flight_area_script = f"""
-        var latlngs = {coordinates};
-        var polygon = L.polygon(latlngs, {{
-            color: '#00AA00',
-            fillColor: '#00FF00',
-            fillOpacity: 0.1,
-            weight: 2
-        }}).addTo(window.map);
-        """
-        self.web_view.page().runJavaScript(flight_area_script)
+        """İşaretçi güncellemesini planla; karede yalnızca en son konum çizilir"""
+        self.last_flight_state = (latitude, longitude, yaw)
+        self.render_scheduler.schedule('flight_marker', self.build_last_flight_marker)
+
+    def build_last_flight_marker(self):
+        if self.last_flight_state is None:
+            return []
+        return [['flightMarker', *self.last_flight_state]]
+
+    def handle_zone_entered(self, zone_id, kind):
+        if kind == 'circle':
+            print(f"⚠️ Yasaklı alana girildi: {zone_id}")
+        else:
+            print(f"Uçuş alanına girildi: {zone_id}")
+
+    def handle_zone_exited(self, zone_id, kind):
+        if kind == 'circle':
+            print(f"Yasaklı alandan çıkıldı: {zone_id}")
+        else:
+            print(f"⚠️ Uçuş alanı dışına çıkıldı: {zone_id}")
+
+    def update_restricted_area_marker(self, latitude, longitude, radius, zone_id=None):
+        if zone_id is None:
+            zone_id = f'restricted-{next(self._zone_sequence)}'
+        self.restricted_areas.append((zone_id, latitude, longitude, radius))
+        self.geofence.add_circle(zone_id, latitude, longitude, radius)
+        
+        self.render_scheduler.append(['restrictedArea', zone_id, latitude, longitude, radius])
+        return zone_id
+
+    def update_enemy_drone_marker(self, latitude, longitude, contact_id=None):
+        """Tek bir düşman temasını güncelle; ID verilmezse yeni temas oluşturulur"""
+        if contact_id is None:
+            contact_id = f'contact-{next(self._contact_sequence)}'
+        self.update_enemy_contacts([(contact_id, latitude, longitude)])
+        return contact_id
+
+    def update_enemy_contacts(self, contacts):
+        """Birden çok teması tek seferde güncelle: [(contact_id, lat, lon), ...]"""
+        for contact_id, latitude, longitude in contacts:
+            self.contact_tracks.update(contact_id, latitude, longitude)
+        self.render_scheduler.schedule('contacts', self.build_contact_messages)
+
+    def remove_enemy_contact(self, contact_id):
+        self.contact_tracks.remove(contact_id)
+        self.render_scheduler.schedule('contacts', self.build_contact_messages)
+
+    def expire_stale_contacts(self):
+        if self.contact_tracks.expire():
+            self.render_scheduler.schedule('contacts', self.build_contact_messages)
+
+    def build_contact_messages(self):
+        """Değişen temaslar için silme ve ekleme/taşıma mesajları"""
+        if not self.contact_tracks.has_changes():
+            return []
+        updated, removed = self.contact_tracks.take_changes()
+        messages = []
+        if removed:
+            messages.append(['contactsRemove', removed])
+        if updated:
+            messages.append(['contactsUpsert', updated])
+        return messages
+
+    def update_flight_area_marker(self, coordinates, zone_id=None):
+        if zone_id is None:
+            zone_id = f'flight-area-{next(self._zone_sequence)}'
+        self.flight_areas.append((zone_id, coordinates))
+        self.geofence.add_polygon(zone_id, coordinates)
+        
+        self.render_scheduler.append(['flightArea', zone_id, coordinates])
+        return zone_id
 
 
 class MapEventHandler(QObject):
     coordinates_received = Signal(float, float)
     right_click_received = Signal(float, float)
+    map_ready = Signal()
+    renderMessages = Signal(str)  # Sayfaya giden mesaj paketi (JSON); map.js dinler
+
+    def __init__(self):
+        super().__init__()
+        self.map_config = '{}'  # Sayfanın açılışta okuduğu ayarlar (JSON)
+
+    @Slot(result=str)
+    def mapConfig(self):
+        return self.map_config
 
     @Slot(float, float)
     def coordinatesClicked(self, latitude, longitude):
@@ -810,6 +1059,10 @@ class MapEventHandler(QObject):
     def rightClickReceived(self, latitude, longitude):
         self.right_click_received.emit(latitude, longitude)
 
+    @Slot()
+    def mapReady(self):
+        self.map_ready.emit()
+
 
 class MapWindow(QMainWindow):
     def __init__(self):
@@ -845,10 +1098,18 @@ class MapWindow(QMainWindow):
         self.map_handler = MapHandler(self.web_view, self)
 
     def closeEvent(self, event):
-        """Uygulama kapatılırken tile server'ını durdur"""
+        """Uygulama kapatılırken tile server'ını ve indirmeyi durdur"""
+        downloader = getattr(self.map_handler, 'tile_downloader', None)
+        if downloader and downloader.isRunning():
+            print("Tile indirme durduruluyor...")
+            downloader.stop()
+            downloader.wait()
         if self.map_handler.offline_manager.tile_server:
             print("Tile server durduruluyor...")
             self.map_handler.offline_manager.stop_tile_server()
+        self.map_handler.offline_manager.connectivity_monitor.stop()
+        self.map_handler.offline_manager.tile_store.close()
+        self.map_handler.offline_manager.tile_metadata.flush()
         event.accept()
 
     def show_progress_bar(self):
@@ -869,7 +1130,11 @@ class MapWindow(QMainWindow):
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MapWindow()
+    metrics.start_periodic_dump()
+    with startup_profiler.phase('qt_app', 'QApplication'):
+        app = QApplication(sys.argv)
+    with startup_profiler.phase('window', 'Pencere oluşturma'):
+        window = MapWindow()
     window.show()
+    startup_profiler.mark('window_shown', 'Pencere görünür')
     sys.exit(app.exec())
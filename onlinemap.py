@@ -1,10 +1,10 @@
 import sys
-import base64
 import os
 from PySide6.QtWidgets import QApplication, QMainWindow
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from PySide6.QtCore import QObject, Signal, Slot
 from PySide6.QtWebChannel import QWebChannel
+from map_icons import load_base64_icon
 
 
 class MapHandler:
@@ -27,39 +27,6 @@ class MapHandler:
 
         self.update_map(0, 0)  # Başlangıçta haritayı yükle
 
-    def get_base64_icon(self):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(base_dir, 'uav2.svg')
-        try:
-            with open(file_path, 'r') as file:
-                svg_data = file.read()
-            return base64.b64encode(svg_data.encode()).decode()
-        except FileNotFoundError:
-            print(f"Error: 'uav2.svg' not found in {base_dir}")
-            return ""
-
-    def get_base64_waypoint_icon(self):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(base_dir, 'waypoint.svg')
-        try:
-            with open(file_path, 'r') as file:
-                svg_data = file.read()
-            return base64.b64encode(svg_data.encode()).decode()
-        except FileNotFoundError:
-            print(f"Error: 'waypoint.svg' not found in {base_dir}")
-            return ""
-
-    def get_base64_enemy_icon(self):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(base_dir, 'enemy_drone.svg')
-        try:
-            with open(file_path, 'r') as file:
-                svg_data = file.read()
-            return base64.b64encode(svg_data.encode()).decode()
-        except FileNotFoundError:
-            print(f"Error: 'enemy_drone.svg' not found in {base_dir}")
-            return ""
-
     def update_map(self, latitude, longitude):
         marker_script = f"""
         var map = L.map('map').setView([{latitude}, {longitude}], 19);
@@ -85,6 +52,38 @@ class MapHandler:
         L.control.layers(baseMaps).addTo(map);
     
         window.map = map;  // Haritayı global olarak sakla
+        
+        // İkonlar bir kez kaydedilir; güncellemeler ikonlara adıyla başvurur
+        window.mapIconUrls = {{
+            uav: 'data:image/svg+xml;base64,{load_base64_icon('uav2.svg')}',
+            waypoint: 'data:image/svg+xml;base64,{load_base64_icon('waypoint.svg')}',
+            enemy: 'data:image/svg+xml;base64,{load_base64_icon('enemy_drone.svg')}'
+        }};
+        window.mapIcons = {{
+            waypoint: L.icon({{ iconUrl: window.mapIconUrls.waypoint, iconSize: [25, 25] }}),
+            enemy: L.icon({{ iconUrl: window.mapIconUrls.enemy, iconSize: [25, 25] }})
+        }};
+        
+        // Drone işaretçisi bir kez oluşturulur, sonra yalnızca konum ve yön güncellenir
+        window.flightMarker = null;
+        window.updateFlightMarker = function(lat, lng, yaw) {{
+            if (!window.flightMarker) {{
+                window.flightMarker = L.marker([lat, lng], {{
+                    icon: L.divIcon({{
+                        html: '<div style="filter: hue-rotate(200deg);"><img src="' + window.mapIconUrls.uav + '" style="width: 25px; height: 25px;"></div>',
+                        className: '',
+                        iconSize: [25, 25],
+                        iconAnchor: [12.5, 12.5]
+                    }})
+                }}).addTo(window.map);
+            }} else {{
+                window.flightMarker.setLatLng([lat, lng]);
+            }}
+            var element = window.flightMarker.getElement();
+            if (element && element.firstChild) {{
+                element.firstChild.style.transform = 'rotate(' + yaw + 'deg)';
+            }}
+        }};
     
         // Sağ tıklama olayını dinle
         map.on('contextmenu', function(e) {{
@@ -284,13 +283,9 @@ class MapHandler:
         """
         Düşman drone işaretçisini günceller - KOYU KIRMIZI
         """
-        enemy_drone_icon = f"data:image/svg+xml;base64,{self.get_base64_enemy_icon()}"
         enemy_drone_script = f"""
         var marker = L.marker([{latitude}, {longitude}], {{
-            icon: L.icon({{
-                iconUrl: '{enemy_drone_icon}',
-                iconSize: [25, 25]
-            }})
+            icon: window.mapIcons.enemy
         }}).addTo(window.map);
         """
         self.web_view.page().runJavaScript(enemy_drone_script)
@@ -320,7 +315,6 @@ class MapHandler:
         """
         Son eklenen waypoint işaretçisini günceller - TURUNCU
         """
-        waypoint_icon = f"data:image/svg+xml;base64,{self.get_base64_waypoint_icon()}"
         waypoint_number = len(self.waypoints)  # Waypoint numarası
         
         last_waypoint_script = f"""
@@ -335,10 +329,7 @@ class MapHandler:
         
         // Waypoint işaretçisi
         window.waypointMarker = L.marker([{latitude}, {longitude}], {{
-            icon: L.icon({{
-                iconUrl: '{waypoint_icon}',
-                iconSize: [25, 25]
-            }})
+            icon: window.mapIcons.waypoint
         }}).addTo(window.map);
         
         // Waypoint numarası etiketi
@@ -407,22 +398,7 @@ class MapHandler:
         """
         Son eklenen uçuş işaretçisini günceller ve yön açısını uygular - MAVİ DRONE
         """
-        uav_icon = f"data:image/svg+xml;base64,{self.get_base64_icon()}"
-        last_flight_script = f"""
-        if (window.flightMarker) {{
-            window.map.removeLayer(window.flightMarker);
-        }}
-        
-        // Drone işaretçisi - mavi renkte
-        window.flightMarker = L.marker([{latitude}, {longitude}], {{
-            icon: L.divIcon({{
-                html: `<div style="transform: rotate({yaw}deg); filter: hue-rotate(200deg);"><img src='{uav_icon}' style='width: 25px; height: 25px;'></div>`,
-                className: '',
-                iconSize: [25, 25],
-                iconAnchor: [12.5, 12.5]
-            }})
-        }}).addTo(window.map);
-        """
+        last_flight_script = f"window.updateFlightMarker({latitude}, {longitude}, {yaw});"
         self.web_view.page().runJavaScript(last_flight_script)
 
 
@@ -0,0 +1,240 @@
+"""Arayüzsüz (Qt'siz) tile ön indirme aracı
+
+Sunucuda veya sahaya çıkmadan önce offline önbelleği doldurmak için. İşler
+uygulamayla aynı kalıcı kuyruğa yazılır; kesilen indirme --resume ile veya
+uygulama açıldığında kaldığı yerden devam eder.
+
+    python prefetch_tiles.py --center 39.92,32.85 --radius 2000 --zoom 14-18
+    python prefetch_tiles.py --bbox 39.8,32.6,40.0,33.0 --zoom 16
+    python prefetch_tiles.py --polygon alan.geojson --zoom 14-18
+    python prefetch_tiles.py --route waypoints.txt --buffer 500
+    python prefetch_tiles.py --resume
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from download_planner import plan_tiles
+from download_queue import DownloadQueue
+from download_runner import DownloadJobRunner, enqueue_region
+from tile_download import ARCGIS_TILE_URL, DEFAULT_MAX_WORKERS, DEFAULT_RATE_LIMIT
+from tile_store import DirectoryTileStore, TileMetadata, open_mbtiles
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ZOOM_LEVELS = '14-18'
+
+
+def parse_floats(value, count, name):
+    parts = [part.strip() for part in value.split(',')]
+    if len(parts) != count:
+        raise argparse.ArgumentTypeError(f"{name} için {count} sayı gerekli: {value}")
+    try:
+        return [float(part) for part in parts]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Geçersiz {name}: {value}")
+
+
+def parse_zoom_levels(value):
+    """'14-18', '16' veya '14,16,18' biçimini zoom listesine çevir"""
+    zooms = set()
+    for part in value.split(','):
+        if '-' in part:
+            low, high = part.split('-', 1)
+            zooms.update(range(int(low), int(high) + 1))
+        else:
+            zooms.add(int(part))
+    if not zooms or min(zooms) < 0 or max(zooms) > 22:
+        raise argparse.ArgumentTypeError(f"Geçersiz zoom aralığı: {value}")
+    return sorted(zooms)
+
+
+def load_polygons(path):
+    """JSON [[lat, lon], ...] veya GeoJSON (Polygon/MultiPolygon/Feature/FeatureCollection)
+
+    GeoJSON koordinatları [lon, lat] sırasındadır; yalnızca dış halkalar kullanılır.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        return [[[float(lat), float(lon)] for lat, lon in data]]
+
+    geometries = []
+    if data.get('type') == 'FeatureCollection':
+        geometries = [feature['geometry'] for feature in data.get('features', [])]
+    elif data.get('type') == 'Feature':
+        geometries = [data['geometry']]
+    else:
+        geometries = [data]
+
+    polygons = []
+    for geometry in geometries:
+        if geometry['type'] == 'Polygon':
+            rings = [geometry['coordinates'][0]]
+        elif geometry['type'] == 'MultiPolygon':
+            rings = [polygon[0] for polygon in geometry['coordinates']]
+        else:
+            continue
+        for ring in rings:
+            polygons.append([[float(lat), float(lon)] for lon, lat, *_ in ring])
+    return polygons
+
+
+def load_route(path):
+    """Uygulamanın kaydettiği waypoints.txt biçimi ('enlem, boylam' satırları)"""
+    points = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                lat, lon = parse_floats(line, 2, 'waypoint')
+                points.append([lat, lon])
+    return points
+
+
+def build_regions(args):
+    """Komut satırı argümanlarından (ad, bölge) listesi"""
+    regions = []
+    if args.center:
+        lat, lon = args.center
+        regions.append((
+            f"{lat:.5f}, {lon:.5f} ({args.radius:g}m)",
+            {'type': 'circle', 'lat': lat, 'lon': lon, 'radius': args.radius}
+        ))
+    if args.bbox:
+        south, west, north, east = args.bbox
+        regions.append((
+            f"Kutu {south}, {west}, {north}, {east}",
+            {'type': 'bbox', 'south': south, 'west': west, 'north': north, 'east': east}
+        ))
+    if args.polygon:
+        for index, polygon in enumerate(load_polygons(args.polygon), 1):
+            regions.append((
+                f"{os.path.basename(args.polygon)} #{index}",
+                {'type': 'polygon', 'points': polygon}
+            ))
+    if args.route:
+        points = load_route(args.route)
+        if points:
+            regions.append((
+                f"Rota koridoru ({len(points)} waypoint, {args.buffer:g}m)",
+                {'type': 'corridor', 'points': points, 'buffer': args.buffer}
+            ))
+    return regions
+
+
+def open_store(path, dedup):
+    if path.endswith('.mbtiles'):
+        return open_mbtiles(path, dedup=dedup)
+    return DirectoryTileStore(path)
+
+
+def default_store_path():
+    """Uygulamayla aynı seçim: MBTiles dosyası varsa o, yoksa dizin deposu"""
+    mbtiles_path = os.path.join(BASE_DIR, 'tiles', 'satellite.mbtiles')
+    if os.path.exists(mbtiles_path):
+        return mbtiles_path
+    return os.path.join(BASE_DIR, 'tiles', 'satellite')
+
+
+def make_progress_printer():
+    state = {'last': 0.0}
+
+    def report(current, total):
+        now = time.monotonic()
+        if current == total or now - state['last'] >= 1.0:
+            state['last'] = now
+            print(f"İlerleme: {current}/{total} ({current * 100 // max(1, total)}%)")
+    return report
+
+
+def run_downloads(runner, job_ids):
+    """Çalıştırıcıyı arka thread'de çalıştır; Ctrl+C işleri kuyrukta bırakarak durdurur"""
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(counts=runner.run(job_ids)), daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.2)
+    except KeyboardInterrupt:
+        print("\nDurduruluyor... (işler kuyrukta kalır, --resume ile devam edilebilir)")
+        runner.stop()
+        worker.join()
+    return result.get('counts', (0, 0, 0))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Qt'siz offline tile ön indirme aracı")
+    region_group = parser.add_argument_group('bölge')
+    region_group.add_argument('--center', type=lambda v: parse_floats(v, 2, 'merkez'), help="ENLEM,BOYLAM")
+    region_group.add_argument('--radius', type=float, default=800, help="Yarıçap (m), varsayılan 800")
+    region_group.add_argument('--bbox', type=lambda v: parse_floats(v, 4, 'kutu'), help="GÜNEY,BATI,KUZEY,DOĞU")
+    region_group.add_argument('--polygon', help="Poligon dosyası (JSON [[lat, lon], ...] veya GeoJSON)")
+    region_group.add_argument('--route', help="Waypoint dosyası ('enlem, boylam' satırları)")
+    region_group.add_argument('--buffer', type=float, default=500, help="Rota koridoru yarı genişliği (m)")
+    parser.add_argument('--zoom', type=parse_zoom_levels, default=parse_zoom_levels(DEFAULT_ZOOM_LEVELS),
+                        help=f"Zoom seviyeleri: 14-18, 16 veya 14,16,18 (varsayılan {DEFAULT_ZOOM_LEVELS})")
+    parser.add_argument('--store', default=None, help="Tile dizini veya .mbtiles dosyası")
+    parser.add_argument('--dedup', action='store_true', help="Yeni .mbtiles dosyasını tekilleştirilmiş oluştur")
+    parser.add_argument('--queue', default=os.path.join(BASE_DIR, 'tiles', 'download_queue.db'),
+                        help="Kalıcı iş kuyruğu dosyası")
+    parser.add_argument('--url', default=ARCGIS_TILE_URL, help="Tile kaynağı şablonu ({z}, {x}, {y})")
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS, help="Eşzamanlı indirme sayısı")
+    parser.add_argument('--rate-limit', type=float, default=DEFAULT_RATE_LIMIT, help="Saniyedeki en fazla istek")
+    parser.add_argument('--refresh', action='store_true', help="Var olan tile'ları koşullu istekle yenile")
+    parser.add_argument('--max-age', type=float, default=None,
+                        help="--refresh ile yalnızca bu kadar günden eski alınmış tile'ları yenile")
+    parser.add_argument('--resume', action='store_true', help="Kuyrukta bekleyen tüm işleri de çalıştır")
+    parser.add_argument('--dry-run', action='store_true', help="Yalnızca tile sayılarını göster")
+    args = parser.parse_args(argv)
+
+    regions = build_regions(args)
+    if not regions and not args.resume:
+        parser.error("En az bir bölge (--center, --bbox, --polygon, --route) veya --resume gerekli")
+    if args.max_age is not None and not args.refresh:
+        parser.error("--max-age yalnızca --refresh ile kullanılabilir")
+
+    if args.dry_run:
+        for name, region in regions:
+            tiles = plan_tiles(region, args.zoom)
+            per_zoom = ', '.join(f"z{zoom}: {sum(1 for tile in tiles if tile[0] == zoom)}" for zoom in args.zoom)
+            print(f"{name}: {len(tiles)} tile ({per_zoom})")
+        return 0
+
+    store = open_store(args.store or default_store_path(), args.dedup)
+    download_queue = DownloadQueue(args.queue)
+    tile_metadata = TileMetadata(os.path.join(os.path.dirname(os.path.abspath(args.queue)), 'tile_meta.db'))
+
+    job_ids = []
+    for name, region in regions:
+        job_id, fetch_count, derived_count = enqueue_region(
+            download_queue, name, region, args.zoom, refresh=args.refresh, tile_metadata=tile_metadata,
+            max_age=args.max_age * 86400 if args.max_age is not None else None
+        )
+        if job_id is None:
+            print(f"{name}: tüm tile'lar {args.max_age:g} günden yeni, yenileme atlandı")
+            continue
+        job_ids.append(job_id)
+        print(f"İş #{job_id} kuyruğa eklendi: {name}, {fetch_count} tile indirilecek, {derived_count} tile üretilecek")
+
+    runner = DownloadJobRunner(
+        download_queue, store, max_workers=args.workers, tile_metadata=tile_metadata,
+        progress_callback=make_progress_printer(), url_template=args.url, rate_limit=args.rate_limit
+    )
+    start = time.monotonic()
+    try:
+        success, failed, total = run_downloads(runner, None if args.resume else set(job_ids))
+    finally:
+        tile_metadata.flush()
+        store.close()
+
+    print(f"Bitti: {success} indirildi, {failed} başarısız, toplam {total} tile, {time.monotonic() - start:.1f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
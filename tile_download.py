@@ -0,0 +1,270 @@
+import datetime
+import email.utils
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+
+ARCGIS_TILE_URL = 'https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}'
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_RATE_LIMIT = 20.0  # Sunucu başına saniyedeki en fazla istek
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # saniye
+BACKOFF_MAX = 30.0
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket hız sınırlayıcı
+
+    Saniyede rate token eklenir, en fazla burst token birikir. acquire() token
+    yoksa gerektiği kadar bekler; stop_event set edilirse beklemeyi bırakır.
+    """
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        """Bir token al; iptal edildiyse False döndür"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
+
+def backoff_delay(attempt, retry_after=None):
+    """attempt. deneme sonrası bekleme süresi (üstel artış + tam jitter)
+
+    Sunucu Retry-After bildirdiyse ondan kısa beklenmez.
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, BACKOFF_MAX))
+    return delay
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    # Bozuk değer yok sayılır; normal üstel bekleme uygulanır
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+class TileDownloadEngine:
+    """Tile'ları sınırlı bir işçi havuzuyla paralel indiren motor (Qt bağımsız)
+
+    Tüm işçiler tek bir requests.Session kullanır; bağlantı havuzu eşzamanlılık
+    limiti kadar büyüktür, böylece keep-alive bağlantıları tile'lar arasında
+    yeniden kullanılır. İstekler sunucu başına token bucket ile sınırlanır,
+    geçici hatalar (zaman aşımı, 429, 5xx) üstel bekleme ile tekrar denenir.
+    tile_metadata verilirse ETag/Last-Modified saklanır ve yenileme modunda
+    koşullu istek atılır; yalnızca değişen tile'lar yeniden indirilir.
+    """
+    def __init__(self, tile_store, max_workers=DEFAULT_MAX_WORKERS, url_template=ARCGIS_TILE_URL, timeout=15,
+                 rate_limit=DEFAULT_RATE_LIMIT, max_retries=MAX_RETRIES, tile_metadata=None):
+        self.tile_store = tile_store
+        self.max_workers = max(1, int(max_workers))
+        self.url_template = url_template
+        self.timeout = timeout
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.tile_metadata = tile_metadata
+        self._stop_event = threading.Event()
+        self._rate_limiters = {}  # host -> TokenBucket
+        self._rate_lock = threading.Lock()
+
+        # Paylaşılan HTTP oturumu (keep-alive bağlantı havuzu)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def stop(self):
+        """Bekleyen indirmeleri iptal et"""
+        self._stop_event.set()
+
+    def close(self):
+        self.session.close()
+
+    def _rate_limiter(self, url):
+        host = urllib.parse.urlsplit(url).netloc
+        with self._rate_lock:
+            limiter = self._rate_limiters.get(host)
+            if limiter is None:
+                limiter = TokenBucket(self.rate_limit, burst=self.max_workers)
+                self._rate_limiters[host] = limiter
+            return limiter
+
+    def _conditional_headers(self, zoom, x, y):
+        meta = self.tile_metadata.get(zoom, x, y) if self.tile_metadata else None
+        if not meta or not self.tile_store.has_tile(zoom, x, y):
+            return {}
+        headers = {}
+        if meta['etag']:
+            headers['If-None-Match'] = meta['etag']
+        if meta['last_modified']:
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def fetch_tile(self, zoom, x, y, refresh=False):
+        """Tek bir tile'ı indir ve depoya yaz. (durum, mesaj) döndürür.
+
+        durum: 'success', 'not_modified', 'failed', 'rejected' (kaynak tekrar
+        denenmeyecek bir hata döndürdü, ör. 404) veya 'cancelled'.
+        """
+        url = self.url_template.format(z=zoom, x=x, y=y)
+        headers = self._conditional_headers(zoom, x, y) if refresh else {}
+        limiter = self._rate_limiter(url) if self.rate_limit else None
+
+        attempt = 0
+        while True:
+            if self._stop_event.is_set():
+                return 'cancelled', None
+            if limiter and not limiter.acquire(self._stop_event):
+                return 'cancelled', None
+
+            retry_after = None
+            if attempt:
+                metrics.inc('download.retries')
+            metrics.inc('download.requests')
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=self.timeout, headers=headers)
+            except requests.RequestException as e:
+                metrics.inc('download.errors')
+                error = f"Tile indirme hatası {zoom}/{x}/{y}: {e}"
+            else:
+                metrics.observe('download.latency_seconds', time.perf_counter() - start)
+                if response.status_code == 200:
+                    break
+                if response.status_code == 304:
+                    self._record_metadata(zoom, x, y, response)
+                    metrics.inc('download.not_modified')
+                    return 'not_modified', None
+                error = f"❌ Hata {response.status_code}: {zoom}/{x}/{y}"
+                if response.status_code not in RETRYABLE_STATUS:
+                    metrics.inc('download.failed')
+                    return 'rejected', error
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+
+            if attempt >= self.max_retries:
+                metrics.inc('download.failed')
+                return 'failed', f"{error} ({attempt + 1} deneme)"
+            if self._stop_event.wait(backoff_delay(attempt, retry_after)):
+                return 'cancelled', None
+            attempt += 1
+
+        data = response.content
+        metrics.inc('download.bytes', len(data))
+        # Doğrulayıcı başlık göndermeyen sunucuda içerik aynıysa yeniden yazma
+        if refresh and self.tile_store.get_tile(zoom, x, y) == data:
+            self._record_metadata(zoom, x, y, response)
+            metrics.inc('download.not_modified')
+            return 'not_modified', None
+
+        self.tile_store.put_tile(zoom, x, y, data)
+        self._record_metadata(zoom, x, y, response)
+        metrics.inc('download.success')
+        return 'success', None
+
+    def _record_metadata(self, zoom, x, y, response):
+        if self.tile_metadata:
+            self.tile_metadata.record(
+                zoom, x, y, response.headers.get('ETag'), response.headers.get('Last-Modified')
+            )
+
+    def download(self, tiles, progress_callback=None, tile_callback=None, refresh=False):
+        """Tile listesini paralel indir
+
+        progress_callback(current, total) ve tile_callback(tile, durum) çağıran
+        thread'den çağrılır; durum 'success', 'skipped', 'not_modified', 'failed',
+        'rejected' veya 'cancelled'. refresh=True ise depoda olan tile'lar
+        atlanmaz, koşullu istekle yenilenir. (başarılı, başarısız, atlanan)
+        sayılarını döndürür.
+        """
+        total = len(tiles)
+        done = 0
+        success_count = 0
+        failed_count = 0
+        skipped_count = 0
+
+        # Zaten var olanları atla
+        pending = []
+        for zoom, x, y in tiles:
+            if not refresh and self.tile_store.has_tile(zoom, x, y):
+                skipped_count += 1
+                done += 1
+                if tile_callback:
+                    tile_callback((zoom, x, y), 'skipped')
+            else:
+                pending.append((zoom, x, y))
+
+        metrics.inc('download.skipped', skipped_count)
+        if progress_callback and skipped_count:
+            progress_callback(done, total)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.fetch_tile, *tile, refresh=refresh): tile for tile in pending}
+
+            for future in as_completed(futures):
+                zoom, x, y = futures[future]
+                try:
+                    status, message = future.result()
+                except Exception as e:
+                    status, message = 'failed', f"Tile indirme hatası {zoom}/{x}/{y}: {e}"
+
+                if status == 'success':
+                    success_count += 1
+                    if success_count % 10 == 0:  # Her 10 başarılı indirmede log
+                        print(f"✅ İndirildi: {success_count}/{total} tile")
+                elif status == 'not_modified':
+                    skipped_count += 1
+                elif status in ('failed', 'rejected'):
+                    failed_count += 1
+                    print(message)
+                if tile_callback:
+                    tile_callback((zoom, x, y), status)
+
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+
+                if self._stop_event.is_set():
+                    for pending_future in futures:
+                        pending_future.cancel()
+                    break
+
+        # Batch halinde yazan depolar için kalanları kaydet
+        self.tile_store.flush()
+        if self.tile_metadata:
+            self.tile_metadata.flush()
+        return success_count, failed_count, skipped_count
@@ -0,0 +1,101 @@
+import threading
+
+from tile_math import num2deg
+
+
+class TileManifest:
+    """Depodaki tile'ların artımlı güncellenen özeti
+
+    Her zoom seviyesi için tile sayısı, x/y sınırları ve ağırlık merkezi için
+    x/y toplamları tutulur. Depo her yeni tile yazdığında add() çağrılır; böylece
+    "tile var mı" ve "merkez nerede" soruları dizin taraması yapmadan cevaplanır.
+    Kalıcılık deponun sorumluluğundadır (to_dict/from_dict).
+    """
+    VERSION = 1
+
+    def __init__(self):
+        self._zooms = {}
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    @classmethod
+    def from_dict(cls, data):
+        """Kaydedilmiş özeti yükle; bilinmeyen sürümde ValueError (depo yeniden tarar)"""
+        if data.get('version') != cls.VERSION:
+            raise ValueError(f"Desteklenmeyen manifest sürümü: {data.get('version')}")
+        manifest = cls()
+        manifest._zooms = {int(zoom): dict(info) for zoom, info in data.get('zooms', {}).items()}
+        return manifest
+
+    @classmethod
+    def from_tiles(cls, tiles):
+        """(zoom, x, y) listesinden baştan oluştur"""
+        manifest = cls()
+        for zoom, x, y in tiles:
+            manifest.add(zoom, x, y)
+        return manifest
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'version': self.VERSION,
+                'zooms': {str(zoom): dict(info) for zoom, info in self._zooms.items()}
+            }
+
+    def add(self, zoom, x, y):
+        """Yeni yazılan bir tile'ı özete ekle (var olan tile için çağrılmamalı)"""
+        with self._lock:
+            info = self._zooms.get(zoom)
+            if info is None:
+                self._zooms[zoom] = {
+                    'count': 1, 'min_x': x, 'max_x': x, 'min_y': y, 'max_y': y, 'sum_x': x, 'sum_y': y
+                }
+            else:
+                info['count'] += 1
+                info['min_x'] = min(info['min_x'], x)
+                info['max_x'] = max(info['max_x'], x)
+                info['min_y'] = min(info['min_y'], y)
+                info['max_y'] = max(info['max_y'], y)
+                info['sum_x'] += x
+                info['sum_y'] += y
+            self.dirty = True
+
+    def count(self, zoom=None):
+        """Zoom seviyesindeki (veya toplam) tile sayısı"""
+        with self._lock:
+            if zoom is not None:
+                info = self._zooms.get(zoom)
+                return info['count'] if info else 0
+            return sum(info['count'] for info in self._zooms.values())
+
+    def zoom_levels(self):
+        with self._lock:
+            return sorted(zoom for zoom, info in self._zooms.items() if info['count'] > 0)
+
+    def bounds(self, zoom):
+        """Zoom seviyesindeki tile'ların (güney, batı, kuzey, doğu) sınırları"""
+        with self._lock:
+            info = self._zooms.get(zoom)
+            if not info:
+                return None
+            north, west = num2deg(info['min_x'], info['min_y'], zoom)
+            south, east = num2deg(info['max_x'] + 1, info['max_y'] + 1, zoom)
+            return south, west, north, east
+
+    def centroid(self, zoom):
+        """Zoom seviyesindeki tile'ların ağırlık merkezi (lat, lon)"""
+        with self._lock:
+            info = self._zooms.get(zoom)
+            if not info:
+                return None
+            mean_x = info['sum_x'] / info['count'] + 0.5
+            mean_y = info['sum_y'] / info['count'] + 0.5
+        return num2deg(mean_x, mean_y, zoom)
+
+    def coverage_center(self, preferred_zoom=16):
+        """Kapsama alanının merkezi; tercih edilen zoom yoksa en detaylı zoom kullanılır"""
+        zooms = self.zoom_levels()
+        if not zooms:
+            return None
+        zoom = preferred_zoom if preferred_zoom in zooms else zooms[-1]
+        return self.centroid(zoom)
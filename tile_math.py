@@ -0,0 +1,157 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:  # NumPy yoksa yalnızca tekil fonksiyonlar kullanılabilir
+    np = None
+
+
+EARTH_CIRCUMFERENCE_M = 40075016.686  # Ekvator çevresi (Web Mercator)
+METERS_PER_DEGREE = 111320  # Yaklaşık, enlem için
+NUMPY_AVAILABLE = np is not None
+
+
+def deg2num(lat_deg, lon_deg, zoom):
+    """Koordinatları tile numaralarına çevir"""
+    lat_rad = math.radians(lat_deg)
+    n = 2.0 ** zoom
+    xtile = int((lon_deg + 180.0) / 360.0 * n)
+    ytile = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return (xtile, ytile)
+
+
+def deg2xy(lat_deg, lon_deg, zoom):
+    """Koordinatları kesirli tile koordinatlarına çevir (tile içi konum dahil)"""
+    lat_rad = math.radians(lat_deg)
+    n = 2.0 ** zoom
+    x = (lon_deg + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    return (x, y)
+
+
+def meters_per_tile(lat_deg, zoom):
+    """Verilen enlemde bir tile kenarının metre cinsinden uzunluğu"""
+    return EARTH_CIRCUMFERENCE_M * math.cos(math.radians(lat_deg)) / (2 ** zoom)
+
+
+def num2deg(xtile, ytile, zoom):
+    """Tile numarasını (kuzeybatı köşesi) koordinata çevir; kesirli değerleri de kabul eder"""
+    n = 2.0 ** zoom
+    lon_deg = xtile / n * 360.0 - 180.0
+    lat_rad = math.atan(math.sinh(math.pi * (1 - 2 * ytile / n)))
+    return (math.degrees(lat_rad), lon_deg)
+
+
+def calculate_tile_bounds(lat, lon, radius_m, zoom):
+    """Belirli yarıçaptaki tile sınırlarını hesapla"""
+    # Radius'u dereceye çevir
+    lat_offset = radius_m / METERS_PER_DEGREE
+    lon_offset = radius_m / (METERS_PER_DEGREE * math.cos(math.radians(lat)))
+
+    # Sınırları hesapla
+    north = lat + lat_offset
+    south = lat - lat_offset
+    east = lon + lon_offset
+    west = lon - lon_offset
+
+    # Tile koordinatlarına çevir
+    min_x, min_y = deg2num(north, west, zoom)
+    max_x, max_y = deg2num(south, east, zoom)
+
+    # Eğer min > max olursa (nadir olsa da), düzelt
+    if min_x > max_x:
+        min_x, max_x = max_x, min_x
+    if min_y > max_y:
+        min_y, max_y = max_y, min_y
+
+    return min_x, min_y, max_x, max_y
+
+
+# Dizi (NumPy) sürümleri: çok sayıda nokta/bölge için tek seferde hesaplar.
+# Girdiler skaler veya dizi olabilir; sonuçlar tekil fonksiyonlarla aynıdır.
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Dizi tabanlı tile hesapları için NumPy gerekli (pip install numpy)")
+
+
+def deg2xy_array(lats, lons, zoom):
+    """Koordinat dizilerini kesirli tile koordinatı dizilerine çevir"""
+    _require_numpy()
+    lat_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    n = 2.0 ** zoom
+    xs = (np.asarray(lons, dtype=np.float64) + 180.0) / 360.0 * n
+    ys = (1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * n
+    return xs, ys
+
+
+def deg2num_array(lats, lons, zoom):
+    """Koordinat dizilerini tam sayı tile numarası dizilerine çevir"""
+    xs, ys = deg2xy_array(lats, lons, zoom)
+    return xs.astype(np.int64), ys.astype(np.int64)
+
+
+def num2deg_array(xtiles, ytiles, zoom):
+    """Tile numarası dizilerini (kuzeybatı köşesi) koordinat dizilerine çevir"""
+    _require_numpy()
+    n = 2.0 ** zoom
+    lons = np.asarray(xtiles, dtype=np.float64) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(ytiles, dtype=np.float64) / n))))
+    return lats, lons
+
+
+def meters_per_tile_array(lats, zoom):
+    _require_numpy()
+    return EARTH_CIRCUMFERENCE_M * np.cos(np.radians(np.asarray(lats, dtype=np.float64))) / (2 ** zoom)
+
+
+def tile_bounds_array(lats, lons, radii_m, zoom):
+    """Çok sayıda merkez + yarıçap için calculate_tile_bounds; (min_x, min_y, max_x, max_y) dizileri"""
+    _require_numpy()
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    lat_offset = np.asarray(radii_m, dtype=np.float64) / METERS_PER_DEGREE
+    lon_offset = lat_offset / np.cos(np.radians(lats))
+    min_x, min_y = deg2num_array(lats + lat_offset, lons - lon_offset, zoom)
+    max_x, max_y = deg2num_array(lats - lat_offset, lons + lon_offset, zoom)
+    return np.minimum(min_x, max_x), np.minimum(min_y, max_y), np.maximum(min_x, max_x), np.maximum(min_y, max_y)
+
+
+def cover_circles(lats, lons, radii_m, zoom):
+    """Dairelerle (merkez + yarıçap) kesişen benzersiz tile'lar; (N, 2) x/y dizisi
+
+    Her dairenin sınır kutusundaki aday tile'lar tek dizide üretilir ve tile
+    karesinin merkeze uzaklığı yarıçapla karşılaştırılır (download_planner'daki
+    tekil daire kapsamasıyla aynı sonuç).
+    """
+    _require_numpy()
+    lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+    lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+    center_x, center_y = deg2xy_array(lats, lons, zoom)
+    # Tile kutuplara doğru küçülür; tekil sürümle aynı şekilde merkez enlemi kullanılır
+    radius = np.broadcast_to(np.asarray(radii_m, dtype=np.float64), lats.shape) / meters_per_tile_array(np.abs(lats), zoom)
+
+    min_x = np.floor(center_x - radius).astype(np.int64)
+    min_y = np.floor(center_y - radius).astype(np.int64)
+    widths = np.floor(center_x + radius).astype(np.int64) - min_x + 1
+    heights = np.floor(center_y + radius).astype(np.int64) - min_y + 1
+    counts = widths * heights
+
+    # Her daireye ait aday tile'ları tek düz dizide sırala
+    owner = np.repeat(np.arange(len(lats)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    tile_x = min_x[owner] + offsets % widths[owner]
+    tile_y = min_y[owner] + offsets // widths[owner]
+
+    # Merkezin tile karesine uzaklığı (merkez karenin içindeyse 0)
+    dx = np.maximum(np.maximum(tile_x - center_x[owner], center_x[owner] - (tile_x + 1)), 0.0)
+    dy = np.maximum(np.maximum(tile_y - center_y[owner], center_y[owner] - (tile_y + 1)), 0.0)
+    inside = np.hypot(dx, dy) <= radius[owner]
+    return np.unique(np.column_stack((tile_x[inside], tile_y[inside])), axis=0)
+
+
+def tiles_area_km2(xtiles, ytiles, zoom):
+    """Tile'ların kapladığı yaklaşık yer alanı (km², tile merkez enlemine göre)"""
+    _require_numpy()
+    lats, _ = num2deg_array(xtiles, np.asarray(ytiles, dtype=np.float64) + 0.5, zoom)
+    return float(np.sum(meters_per_tile_array(lats, zoom) ** 2) / 1e6)
@@ -0,0 +1,201 @@
+import io
+import multiprocessing
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow yoksa piramit üretilmez, tüm zoom seviyeleri indirilir
+    Image = None
+
+
+PYRAMID_AVAILABLE = Image is not None
+TILE_SIZE = 256
+JPEG_QUALITY = 90
+
+
+def child_tiles(zoom, x, y):
+    """Bir tile'ın bir alt zoom'daki 4 çocuğu (sol üst, sağ üst, sol alt, sağ alt)"""
+    return (
+        (zoom + 1, 2 * x, 2 * y),
+        (zoom + 1, 2 * x + 1, 2 * y),
+        (zoom + 1, 2 * x, 2 * y + 1),
+        (zoom + 1, 2 * x + 1, 2 * y + 1),
+    )
+
+
+def split_derivable(tiles):
+    """Tile listesini (indirilecek, üretilecek) olarak ikiye ayır
+
+    Dört çocuğu da listede olan bir tile indirilmez; çocukları indirildikten
+    (veya üretildikten) sonra yerelde küçültülerek oluşturulur. En derin zoom
+    her zaman indirilir, bölge kenarındaki eksik çocuklu tile'lar da indirilir.
+    """
+    planned = set(tiles)
+    fetch = []
+    derived = []
+    for tile in tiles:
+        if all(child in planned for child in child_tiles(*tile)):
+            derived.append(tile)
+        else:
+            fetch.append(tile)
+    return fetch, derived
+
+
+def _encode(image, image_format):
+    output = io.BytesIO()
+    if image_format == 'JPEG':
+        image.convert('RGB').save(output, 'JPEG', quality=JPEG_QUALITY)
+    elif image_format == 'WEBP':
+        image.save(output, 'WEBP', quality=JPEG_QUALITY)
+    else:
+        image.save(output, 'PNG', optimize=False)
+    return output.getvalue()
+
+
+def downsample_tile(children):
+    """4 çocuk tile verisinden üst tile'ı üret (işçi süreçte çalışır)
+
+    Çıktı formatı çocuklarınkiyle aynıdır (ArcGIS tile'ları JPEG'dir). Eksik
+    çocuklar (None) şeffaf bırakılır ve çıktı PNG olur.
+    """
+    images = [Image.open(io.BytesIO(data)) if data is not None else None for data in children]
+    present = [image for image in images if image is not None]
+    if not present:
+        return None
+    image_format = present[0].format or 'PNG'
+    if len(present) < 4:
+        image_format = 'PNG'
+    mode = 'RGB' if image_format == 'JPEG' else 'RGBA'
+
+    canvas = Image.new(mode, (TILE_SIZE * 2, TILE_SIZE * 2))
+    for index, image in enumerate(images):
+        if image is None:
+            continue
+        if image.size != (TILE_SIZE, TILE_SIZE):
+            image = image.resize((TILE_SIZE, TILE_SIZE))
+        canvas.paste(image.convert(mode), ((index % 2) * TILE_SIZE, (index // 2) * TILE_SIZE))
+    parent = canvas.reduce(2)  # 2x2 kutu filtresi ile küçült
+    return _encode(parent, image_format)
+
+
+def upscale_tile(data, zoom_delta, x, y):
+    """Ata tile'ın (x, y) torununa düşen parçasını kırpıp tile boyutuna büyüt
+
+    zoom_delta, atanın kaç seviye yukarıda olduğudur; x, y torunun koordinatlarıdır.
+    """
+    image = Image.open(io.BytesIO(data))
+    image_format = image.format or 'PNG'
+    scale = 2 ** zoom_delta
+    size = image.width / scale
+    left = (x % scale) * size
+    top = (y % scale) * size
+    tile = image.convert('RGB' if image_format == 'JPEG' else 'RGBA').resize(
+        (TILE_SIZE, TILE_SIZE), Image.BILINEAR, box=(left, top, left + size, top + size)
+    )
+    return _encode(tile, image_format)
+
+
+def build_pyramid(tile_store, tiles, max_workers=None, progress_callback=None, should_stop=None, overwrite=False):
+    """Verilen üst zoom tile'larını çocuklarından çok çekirdekte üret
+
+    Tile'lar en derin zoom'dan başlayarak seviye seviye işlenir; böylece bir
+    seviyede üretilenler bir üst seviyenin girdisi olur. Görüntü işleme işçi
+    süreçlerde yapılır, depo okuma/yazma yalnızca çağıran thread'dedir.
+    (üretilen, atlanan) sayılarını döndürür.
+    """
+    if not PYRAMID_AVAILABLE:
+        raise RuntimeError("Tile piramidi için Pillow gerekli (pip install Pillow)")
+
+    by_zoom = {}
+    for zoom, x, y in tiles:
+        by_zoom.setdefault(zoom, []).append((zoom, x, y))
+
+    total = sum(len(level) for level in by_zoom.values())
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_workers * 4  # Bellekte aynı anda tutulan görev sayısı sınırlı
+    done = 0
+    built = 0
+    skipped = 0
+
+    # spawn: Qt thread'lerinden fork etmek güvenli değil
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        for zoom in sorted(by_zoom, reverse=True):
+            in_flight = {}
+
+            def collect(finished):
+                nonlocal done, built, skipped
+                for future in finished:
+                    tile = in_flight.pop(future)
+                    try:
+                        tile_store.put_tile(*tile, future.result())
+                        built += 1
+                    except Exception as e:
+                        print(f"Piramit tile hatası {tile[0]}/{tile[1]}/{tile[2]}: {e}")
+                        skipped += 1
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total)
+
+            for tile in by_zoom[zoom]:
+                if should_stop and should_stop():
+                    break
+                if not overwrite and tile_store.has_tile(*tile):
+                    done += 1
+                    continue
+
+                children = [tile_store.get_tile(*child) for child in child_tiles(*tile)]
+                if any(data is None for data in children):
+                    skipped += 1
+                    done += 1
+                    continue
+
+                in_flight[executor.submit(downsample_tile, children)] = tile
+                if len(in_flight) >= max_in_flight:
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(finished)
+
+            collect(wait(in_flight)[0])
+            # Bir üst seviye bu seviyenin tile'larını okuyacak
+            tile_store.flush()
+
+            if should_stop and should_stop():
+                break
+
+    return built, skipped
+
+
+def build_store_pyramid(tile_store, min_zoom, max_workers=None):
+    """Depodaki en derin zoom'dan min_zoom'a kadar eksik üst tile'ları üret"""
+    zoom_levels = tile_store.manifest.zoom_levels()
+    if not zoom_levels:
+        return 0, 0
+    max_zoom = max(zoom_levels)
+
+    tiles = []
+    level = {(x // 2, y // 2) for zoom, x, y in tile_store.iter_tiles() if zoom == max_zoom}
+    for zoom in range(max_zoom - 1, min_zoom - 1, -1):
+        tiles.extend((zoom, x, y) for x, y in sorted(level))
+        level = {(x // 2, y // 2) for x, y in level}
+
+    def report(current, total):
+        if current % 1000 == 0 or current == total:
+            print(f"Piramit: {current}/{total} tile")
+
+    return build_pyramid(tile_store, tiles, max_workers=max_workers, progress_callback=report)
+
+
+if __name__ == "__main__":
+    from tile_store import open_tile_store
+
+    if len(sys.argv) != 3 or not sys.argv[2].isdigit():
+        print("Kullanım: python tile_pyramid.py <tiles_dizini | dosya.mbtiles> <min_zoom>")
+        sys.exit(1)
+    store = open_tile_store(sys.argv[1])
+    try:
+        built, skipped = build_store_pyramid(store, int(sys.argv[2]))
+        print(f"Piramit tamamlandı: {built} tile üretildi, {skipped} atlandı")
+    finally:
+        store.close()
@@ -0,0 +1,116 @@
+import io
+import multiprocessing
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from tile_pyramid import PYRAMID_AVAILABLE, Image
+from tile_store import detect_tile_format
+
+
+DEFAULT_FORMAT = 'webp'
+DEFAULT_QUALITY = 80
+PIL_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG', 'png': 'PNG'}
+
+
+def reencode_tile(data, tile_format, quality):
+    """Tile verisini hedef formata dönüştür (işçi süreçte çalışır)
+
+    Şeffaflık içeren tile'lar JPEG'e çevrilmez. Dönüştürülen veri daha büyükse
+    None döndürür, böylece depodaki tile değişmez.
+    """
+    image = Image.open(io.BytesIO(data))
+    has_alpha = image.mode in ('RGBA', 'LA', 'P') and image.convert('RGBA').getextrema()[3][0] < 255
+    if tile_format == 'jpg' and has_alpha:
+        return None
+
+    output = io.BytesIO()
+    if tile_format == 'png':
+        image.save(output, 'PNG', optimize=True)
+    else:
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        image.save(output, PIL_FORMATS[tile_format], quality=quality)
+
+    encoded = output.getvalue()
+    return encoded if len(encoded) < len(data) else None
+
+
+def reencode_store(tile_store, tile_format=DEFAULT_FORMAT, quality=DEFAULT_QUALITY, max_workers=None):
+    """Depodaki tüm tile'ları hedef formata çok çekirdekte dönüştür
+
+    Zaten hedef formatta olan tile'lar atlanır. Görüntü işleme işçi süreçlerde,
+    depo okuma/yazma çağıran thread'de yapılır. MBTiles 'format' bilgisi yalnızca
+    tüm tile'lar hedef formattaysa güncellenir (eski formatta kalan varsa değişmez).
+    (dönüştürülen, önceki toplam bayt, sonraki toplam bayt) döndürür.
+    """
+    if not PYRAMID_AVAILABLE:
+        raise RuntimeError("Yeniden kodlama için Pillow gerekli (pip install Pillow)")
+    if tile_format not in PIL_FORMATS:
+        raise ValueError(f"Desteklenmeyen format: {tile_format}")
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_workers * 4
+    converted = 0
+    bytes_before = 0
+    bytes_after = 0
+    kept = 0  # Küçülmediği veya hata verdiği için eski formatta kalan tile'lar
+    in_flight = {}
+
+    def collect(finished):
+        nonlocal converted, bytes_after, kept
+        for future in finished:
+            tile, original_size = in_flight.pop(future)
+            try:
+                encoded = future.result()
+            except Exception as e:
+                print(f"Yeniden kodlama hatası {tile[0]}/{tile[1]}/{tile[2]}: {e}")
+                encoded = None
+            if encoded is None:
+                bytes_after += original_size
+                kept += 1
+                continue
+            tile_store.put_tile(*tile, encoded)
+            bytes_after += len(encoded)
+            converted += 1
+            if converted % 1000 == 0:
+                print(f"Dönüştürüldü: {converted} tile")
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        for tile in list(tile_store.iter_tiles()):
+            data = tile_store.get_tile(*tile)
+            if data is None:
+                continue
+            bytes_before += len(data)
+            if detect_tile_format(data) == tile_format:
+                bytes_after += len(data)
+                continue
+
+            in_flight[executor.submit(reencode_tile, data, tile_format, quality)] = (tile, len(data))
+            if len(in_flight) >= max_in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(finished)
+        collect(wait(in_flight)[0])
+
+    tile_store.flush()
+    if kept:
+        print(f"{kept} tile eski formatında bırakıldı, depo formatı güncellenmedi")
+    elif hasattr(tile_store, 'set_format'):
+        tile_store.set_format(tile_format)
+    return converted, bytes_before, bytes_after
+
+
+if __name__ == "__main__":
+    from tile_store import open_tile_store
+
+    if len(sys.argv) not in (3, 4) or sys.argv[2] not in PIL_FORMATS:
+        print("Kullanım: python tile_reencode.py <tiles_dizini | dosya.mbtiles> <webp|jpg|png> [kalite]")
+        sys.exit(1)
+    quality = int(sys.argv[3]) if len(sys.argv) == 4 else DEFAULT_QUALITY
+    store = open_tile_store(sys.argv[1])
+    try:
+        converted, before, after = reencode_store(store, sys.argv[2], quality)
+        saved = (1 - after / before) * 100 if before else 0
+        print(f"Yeniden kodlama tamamlandı: {converted} tile, {before / 1e6:.1f} MB → {after / 1e6:.1f} MB (%{saved:.0f} tasarruf)")
+    finally:
+        store.close()
@@ -0,0 +1,409 @@
+import hashlib
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from threading import Thread
+
+import metrics
+from tile_pyramid import PYRAMID_AVAILABLE, child_tiles, downsample_tile, upscale_tile
+from tile_store import TILE_CONTENT_TYPES, detect_tile_format
+
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024  # 64 MB
+TILE_MAX_AGE = 86400  # Tarayıcı önbellek süresi (saniye)
+STATIC_MAX_AGE = 365 * 86400  # Sürüm parametreli (?v=) statik dosyalar değişmez kabul edilir
+STATIC_CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.svg': 'image/svg+xml',
+    '.png': 'image/png',
+}
+MAX_OVERZOOM_LEVELS = 6  # Eksik tile için en fazla bu kadar üst zoom'daki ataya bakılır
+MAX_ZOOM = 24
+MISSING_TILE_TTL = 5.0  # Bulunamayan tile bu süre (saniye) depoya sorulmadan 404 döner
+MAX_MISSING_ENTRIES = 10000
+
+
+def synthesize_tile(tile_store, zoom, x, y):
+    """Depoda olmayan tile'ı komşu zoom'lardaki tile'lardan üret
+
+    Dört çocuğu da varsa onlardan küçültülür (underzoom); yoksa en yakın atanın
+    ilgili parçası büyütülür (overzoom); ata da yoksa mevcut çocuklardan kısmi
+    mozaik yapılır. (data, kaynak) veya (None, None) döndürür; kaynak
+    'children', 'ancestor' ya da 'partial'.
+    """
+    if not PYRAMID_AVAILABLE or not 0 <= zoom <= MAX_ZOOM:
+        return None, None
+
+    children = []
+    if zoom < MAX_ZOOM:
+        children = [tile_store.get_tile(*child) for child in child_tiles(zoom, x, y)]
+        if all(data is not None for data in children):
+            return downsample_tile(children), 'children'
+
+    for zoom_delta in range(1, min(MAX_OVERZOOM_LEVELS, zoom) + 1):
+        data = tile_store.get_tile(zoom - zoom_delta, x >> zoom_delta, y >> zoom_delta)
+        if data is not None:
+            return upscale_tile(data, zoom_delta, x, y), 'ancestor'
+
+    if any(data is not None for data in children):
+        return downsample_tile(children), 'partial'
+    return None, None
+
+
+def store_tile_hash(tile_store, key):
+    """Depo içerik özetini destekliyorsa tile'ın özetini döndür"""
+    tile_hash = getattr(tile_store, 'tile_hash', None)
+    return tile_hash(*key) if tile_hash else None
+
+
+class TileCache:
+    """Toplam bayt boyutu ile sınırlı, thread-safe LRU tile önbelleği
+
+    Bulunamayan tile'lar da kısa süreliğine hatırlanır; boş alanlara gelen
+    tekrar istekler ata/çocuk aramasını her seferinde yapmaz.
+    """
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, missing_ttl=MISSING_TILE_TTL):
+        self.max_bytes = max_bytes
+        self.missing_ttl = missing_ttl
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (data, etag, synthetic)
+        self._missing = OrderedDict()  # key -> geçerlilik bitiş anı (monotonic)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, data, etag, synthetic=None):
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old[0])
+            self._entries[key] = (data, etag, synthetic)
+            self.current_bytes += size
+
+            # En az kullanılanları at
+            while self.current_bytes > self.max_bytes:
+                _, old_entry = self._entries.popitem(last=False)
+                self.current_bytes -= len(old_entry[0])
+
+    def mark_missing(self, key):
+        with self._lock:
+            self._missing[key] = time.monotonic() + self.missing_ttl
+            self._missing.move_to_end(key)
+            while len(self._missing) > MAX_MISSING_ENTRIES:
+                self._missing.popitem(last=False)
+
+    def is_missing(self, key):
+        """Tile yakın zamanda bulunamadıysa True"""
+        with self._lock:
+            expires = self._missing.get(key)
+            if expires is None:
+                return False
+            if expires > time.monotonic():
+                return True
+            del self._missing[key]
+            return False
+
+    def invalidate(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old[0])
+            self._missing.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._missing.clear()
+            self.current_bytes = 0
+
+
+class StaticFiles:
+    """/static/<önek>/<dosya> isteklerini eşlenmiş dizinlerden karşılayan kaynak
+
+    Dosyalar değişiklik zamanı ve boyutu aynı kaldıkça bellekte tutulur; yalnızca
+    STATIC_CONTENT_TYPES'taki uzantılar serve edilir, dizin dışına çıkılamaz.
+    """
+    def __init__(self, directories):
+        self.directories = {prefix: os.path.realpath(path) for prefix, path in directories.items()}
+        self._entries = {}  # dosya yolu -> (stat anahtarı, data, etag)
+        self._lock = threading.Lock()
+
+    def resolve(self, url_path):
+        parts = url_path.lstrip('/').split('/', 2)
+        if len(parts) != 3 or parts[0] != 'static' or parts[1] not in self.directories:
+            return None
+        base = self.directories[parts[1]]
+        path = os.path.realpath(os.path.join(base, urllib.parse.unquote(parts[2])))
+        if not path.startswith(base + os.sep) or os.path.splitext(path)[1] not in STATIC_CONTENT_TYPES:
+            return None
+        return path
+
+    def load(self, url_path):
+        """(data, etag, content_type) veya dosya yoksa None döndürür"""
+        path = self.resolve(url_path)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        content_type = STATIC_CONTENT_TYPES[os.path.splitext(path)[1]]
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or entry[0] != stat_key:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                return None
+            entry = (stat_key, data, '"%s"' % hashlib.md5(data).hexdigest())
+            with self._lock:
+                self._entries[path] = entry
+        return entry[1], entry[2], content_type
+
+
+class TileRequestHandler(http.server.BaseHTTPRequestHandler):
+    """/{z}/{x}/{y}.png isteklerini önbellek + tile deposundan cevaplayan handler
+
+    /static/ altındaki statik dosyalar ve /metrics de aynı server'dan cevaplanır.
+    """
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+    # Başlık ve gövde ayrı yazılıyor; Nagle + gecikmeli ACK keep-alive'da ~40 ms ekler
+    disable_nagle_algorithm = True
+
+    def parse_tile_path(self):
+        parts = urllib.parse.urlparse(self.path).path.strip('/').split('/')
+        if len(parts) != 3:
+            return None
+        try:
+            return int(parts[0]), int(parts[1]), int(os.path.splitext(parts[2])[0])
+        except ValueError:
+            return None
+
+    def load_tile(self, key):
+        """Tile'ı önce önbellekten, yoksa depodan yükle; depoda yoksa üret
+
+        (data, etag, synthetic) döndürür; synthetic gerçek tile için None.
+        Kısmi mozaikler ('partial') önbelleğe alınmaz, çocukları indirildikçe
+        tamamlanırlar. Bulunamayan tile MISSING_TILE_TTL boyunca yeniden aranmaz.
+        """
+        tile_cache = self.server.tile_cache
+        tile_store = self.server.tile_store
+        if tile_cache.is_missing(key):
+            metrics.inc('server.missing_hits')
+            return None
+
+        # Tekilleştirilmiş depoda önbellek içerik özetiyle tutulur; aynı içerikli
+        # tile'lar (deniz, boş alan) tek önbellek girdisini paylaşır
+        tile_hash = store_tile_hash(tile_store, key)
+        if tile_hash is not None:
+            entry = tile_cache.get(tile_hash)
+            if entry is not None:
+                metrics.inc('server.cache_hits')
+                return entry
+            metrics.inc('server.cache_misses')
+            data = tile_store.get_blob(tile_hash)
+            if data is not None:
+                etag = f'"{tile_hash}"'
+                tile_cache.put(tile_hash, data, etag)
+                return data, etag, None
+
+        entry = tile_cache.get(key)
+        if entry is not None:
+            # Üretilmiş tile'ın yerine bu arada gerçeği indirilmiş olabilir
+            if entry[2] is None or not tile_store.has_tile(*key):
+                metrics.inc('server.cache_hits')
+                return entry
+            tile_cache.invalidate(key)
+        metrics.inc('server.cache_misses')
+
+        data = tile_store.get_tile(*key)
+        synthetic = None
+        if data is None:
+            try:
+                data, synthetic = synthesize_tile(tile_store, *key)
+            except Exception as e:
+                print(f"Tile üretme hatası {key}: {e}")
+                data = None
+            if data is None:
+                tile_cache.mark_missing(key)
+                return None
+            metrics.inc('server.synthetic')
+        etag = '"%s"' % hashlib.md5(data).hexdigest()
+        if synthetic != 'partial':
+            tile_cache.put(key, data, etag, synthetic)
+        return data, etag, synthetic
+
+    def do_GET(self):
+        path = urllib.parse.urlparse(self.path).path
+        if path == '/metrics':
+            self.send_metrics()
+        elif path.startswith('/static/'):
+            self.send_static(include_body=True)
+        else:
+            self.send_tile(include_body=True)
+
+    def send_metrics(self):
+        """Metrik kaydının anlık görüntüsünü JSON olarak döndür (MAP_METRICS=1)"""
+        body = json.dumps(metrics.snapshot()).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        path = urllib.parse.urlparse(self.path).path
+        if path.startswith('/static/'):
+            self.send_static(include_body=False)
+        else:
+            self.send_tile(include_body=False)
+
+    def send_cacheable(self, data, etag, content_type, cache_control, include_body, extra_headers=()):
+        """ETag eşleşirse 304, yoksa 200 ile gövdeyi gönder. 304 gönderildiyse True."""
+        if self.headers.get('If-None-Match') == etag:
+            # Tarayıcıdaki kopya güncel
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', cache_control)
+            self.end_headers()
+            return True
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', cache_control)
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if include_body:
+            self.wfile.write(data)
+        return False
+
+    def send_tile(self, include_body):
+        start = time.perf_counter()
+        metrics.inc('server.requests')
+        key = self.parse_tile_path()
+        entry = self.load_tile(key) if key else None
+
+        if entry is None:
+            metrics.inc('server.not_found')
+            self.send_error(404, "Tile not found")
+            return
+
+        data, etag, synthetic = entry
+        # Üretilmiş tile'lar tarayıcıda her seferinde doğrulanır; gerçeği gelince değişsin
+        cache_control = 'no-cache' if synthetic else f'public, max-age={TILE_MAX_AGE}'
+        extra_headers = [('X-Tile-Synthetic', synthetic)] if synthetic else []
+        content_type = TILE_CONTENT_TYPES.get(detect_tile_format(data), 'image/png')
+        if self.send_cacheable(data, etag, content_type, cache_control, include_body, extra_headers):
+            metrics.inc('server.not_modified')
+        elif include_body:
+            metrics.inc('server.bytes_sent', len(data))
+        metrics.observe('server.latency_seconds', time.perf_counter() - start)
+
+    def send_static(self, include_body):
+        """Harita sayfası ve Leaflet gibi statik dosyaları serve et
+
+        Sürüm parametreli adresler uzun süre önbellekte tutulur; diğerleri her
+        yüklemede ETag ile doğrulanır (değişmediyse 304).
+        """
+        metrics.inc('server.static_requests')
+        url = urllib.parse.urlparse(self.path)
+        static_files = self.server.static_files
+        entry = static_files.load(url.path) if static_files else None
+        if entry is None:
+            self.send_error(404, "File not found")
+            return
+
+        data, etag, content_type = entry
+        versioned = 'v' in urllib.parse.parse_qs(url.query)
+        cache_control = f'public, max-age={STATIC_MAX_AGE}, immutable' if versioned else 'no-cache'
+        self.send_cacheable(data, etag, content_type, cache_control, include_body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TileHTTPServer(http.server.ThreadingHTTPServer):
+    """Her bağlantıyı ayrı thread'de işleyen tile HTTP server'ı"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, tile_store, tile_cache, static_files=None):
+        self.tile_store = tile_store
+        self.tile_cache = tile_cache
+        self.static_files = static_files
+        super().__init__(address, TileRequestHandler)
+
+    def handle_error(self, request, client_address):
+        # İstemcinin bağlantıyı kapatması (sayfa yenileme, pan) hata değildir
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class TileServer(Thread):
+    """Yerel tile deposunu serve eden çok thread'li HTTP server
+
+    static_dirs verilirse ({önek: dizin}) /static/<önek>/ altındaki dosyalar da
+    serve edilir (harita sayfası, Leaflet).
+    """
+    def __init__(self, tile_store, port=8000, cache_bytes=DEFAULT_CACHE_BYTES, static_dirs=None):
+        super().__init__(daemon=True)
+        self.tile_store = tile_store
+        self.port = port
+        self.tile_cache = TileCache(cache_bytes)
+        self.static_files = StaticFiles(static_dirs) if static_dirs else None
+        self.server = None
+        self.error = None
+        self.ready = threading.Event()  # Soket dinlemeye başladığında (veya hata olduğunda) set edilir
+
+    def run(self):
+        try:
+            # HTTP server başlat
+            self.server = TileHTTPServer(("", self.port), self.tile_store, self.tile_cache, self.static_files)
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            print(f"Tile server hatası: {e}")
+            return
+        print(f"Tile server başlatıldı: http://localhost:{self.port}")
+        self.ready.set()
+        try:
+            self.server.serve_forever()
+        except Exception as e:
+            print(f"Tile server hatası: {e}")
+
+    def wait_ready(self, timeout=None):
+        """Server istek kabul etmeye hazır olana kadar bekle; hazırsa True"""
+        self.ready.wait(timeout)
+        return self.server is not None and self.error is None
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
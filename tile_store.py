@@ -0,0 +1,623 @@
+import hashlib
+import json
+import os
+import sys
+import sqlite3
+import threading
+import time
+
+from tile_manifest import TileManifest
+from tile_math import NUMPY_AVAILABLE, tiles_area_km2
+
+
+MANIFEST_SAVE_INTERVAL = 500  # Bu kadar yeni tile'da bir manifest'i kaydet
+TILE_EXTENSIONS = ('png', 'jpg', 'webp')  # Dizin deposunda aranma sırası
+TILE_CONTENT_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'webp': 'image/webp'}
+
+
+def detect_tile_format(data):
+    """Tile verisinin formatını ilk baytlarından bul ('png', 'jpg', 'webp' veya None)
+
+    ArcGIS tile'ları uzantıdan bağımsız olarak JPEG gelir; içerik türü dosya
+    adına değil veriye göre belirlenir.
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'png'
+    if data[:3] == b'\xff\xd8\xff':
+        return 'jpg'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class DirectoryTileStore:
+    """tiles/satellite/{z}/{x}/{y}.{png,jpg,webp} dizin yapısında tile deposu
+
+    Dosya uzantısı verinin gerçek formatına göre seçilir; eski kurulumlardaki
+    .png adlı JPEG dosyaları da okunur. Tile özeti dizinin kökündeki
+    manifest.json dosyasında tutulur; açılışta dizin imzası tutmazsa (yarıda
+    kalan yazma, dışarıdan kopyalanan tile'lar) dizin yeniden taranır.
+    """
+    def __init__(self, tiles_dir):
+        self.tiles_dir = tiles_dir
+        self.manifest_path = os.path.join(tiles_dir, 'manifest.json')
+        self._unsaved = 0
+        self._manifest_lock = threading.Lock()
+        os.makedirs(self.tiles_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            manifest = TileManifest.from_dict(data)
+            if data.get('signature') == self._directory_signature():
+                return manifest
+            print("Tile manifest'i dizinle uyuşmuyor, dizin yeniden taranıyor")
+        except (OSError, ValueError):
+            pass
+        # Manifest yoksa, eskiyse veya dizin değiştiyse dizini baştan tara
+        manifest = TileManifest.from_tiles(self.iter_tiles())
+        self._save_manifest(manifest)
+        return manifest
+
+    def _directory_signature(self):
+        """Zoom başına x dizini sayısı ve dizinlerin en son değişiklik zamanı
+
+        Tile eklenince veya silinince bulunduğu x dizininin mtime'ı değişir;
+        böylece tile dosyalarını listelemeden manifest'in güncelliği anlaşılır.
+        """
+        signature = {}
+        for zoom_entry in os.scandir(self.tiles_dir):
+            if not zoom_entry.name.isdigit() or not zoom_entry.is_dir():
+                continue
+            x_count = 0
+            latest = zoom_entry.stat().st_mtime_ns
+            for x_entry in os.scandir(zoom_entry.path):
+                if x_entry.name.isdigit() and x_entry.is_dir():
+                    x_count += 1
+                    latest = max(latest, x_entry.stat().st_mtime_ns)
+            signature[zoom_entry.name] = [x_count, latest]
+        return signature
+
+    def _save_manifest(self, manifest):
+        # İmza özetten önce alınır; arada yazılan tile bir sonraki açılışta taramaya yol açar
+        signature = self._directory_signature()
+        data = manifest.to_dict()
+        data['signature'] = signature
+        tmp_path = f'{self.manifest_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.manifest_path)
+        manifest.dirty = False
+
+    def rebuild_manifest(self):
+        """Manifest'i dizin taramasıyla baştan oluştur"""
+        self.manifest = TileManifest.from_tiles(self.iter_tiles())
+        self._save_manifest(self.manifest)
+
+    def tile_path(self, zoom, x, y, ext='png'):
+        return os.path.join(self.tiles_dir, str(zoom), str(x), f'{y}.{ext}')
+
+    def _existing_path(self, zoom, x, y):
+        for ext in TILE_EXTENSIONS:
+            tile_path = self.tile_path(zoom, x, y, ext)
+            if os.path.exists(tile_path):
+                return tile_path
+        return None
+
+    def has_tile(self, zoom, x, y):
+        return self._existing_path(zoom, x, y) is not None
+
+    def get_tile(self, zoom, x, y):
+        for ext in TILE_EXTENSIONS:
+            try:
+                with open(self.tile_path(zoom, x, y, ext), 'rb') as f:
+                    return f.read()
+            except OSError:
+                continue
+        return None
+
+    def put_tile(self, zoom, x, y, data):
+        tile_path = self.tile_path(zoom, x, y, detect_tile_format(data) or 'png')
+        os.makedirs(os.path.dirname(tile_path), exist_ok=True)
+        old_path = self._existing_path(zoom, x, y)
+
+        # Yarım yazılmış tile'ların serve edilmemesi için önce geçici dosyaya yaz
+        tmp_path = f'{tile_path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, tile_path)
+
+        if old_path is None:
+            self.manifest.add(zoom, x, y)
+            with self._manifest_lock:
+                self._unsaved += 1
+                save_now = self._unsaved >= MANIFEST_SAVE_INTERVAL
+            if save_now:
+                self.flush()
+            return
+        # Üzerine yazma da dizin imzasını değiştirir; sonraki flush imzayı kaydetsin
+        self.manifest.dirty = True
+        if old_path != tile_path:
+            # Format değişti (yeniden kodlama); eski uzantılı kopyayı sil
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def flush(self):
+        """Manifest'teki değişiklikleri kaydet"""
+        with self._manifest_lock:
+            if self.manifest.dirty:
+                self._unsaved = 0
+                self._save_manifest(self.manifest)
+
+    def close(self):
+        self.flush()
+
+    def iter_tiles(self):
+        """Depodaki tüm (zoom, x, y) üçlülerini üret"""
+        for zoom_dir in os.listdir(self.tiles_dir):
+            zoom_path = os.path.join(self.tiles_dir, zoom_dir)
+            if not zoom_dir.isdigit() or not os.path.isdir(zoom_path):
+                continue
+            for x_dir in os.listdir(zoom_path):
+                x_path = os.path.join(zoom_path, x_dir)
+                if not x_dir.isdigit() or not os.path.isdir(x_path):
+                    continue
+                for y_file in os.listdir(x_path):
+                    y_name, ext = os.path.splitext(y_file)
+                    if ext[1:] in TILE_EXTENSIONS and y_name.isdigit():
+                        yield int(zoom_dir), int(x_dir), int(y_name)
+
+
+class MBTilesTileStore:
+    """Tek dosyalık MBTiles (SQLite) tile deposu
+
+    Yazmalar bellekte biriktirilir ve batch_size tile'da bir tek transaction
+    ile veritabanına aktarılır. Her thread kendi SQLite bağlantısını kullanır;
+    WAL modu sayesinde tile server okurken indirme devam edebilir.
+    MBTiles standardına uygun olarak satırlar TMS düzeninde (y ters) saklanır;
+    tile özeti metadata tablosunda 'tile_manifest' satırında tutulur.
+    """
+    _index_table = 'tiles'  # Tile varlığı bu tablodan sorgulanır
+
+    def __init__(self, path, batch_size=200, name='satellite'):
+        self.path = path
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._connections = []
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS metadata (name TEXT, value TEXT)')
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS metadata_name ON metadata (name)')
+        self._create_schema(conn)
+        conn.executemany(
+            'INSERT OR IGNORE INTO metadata (name, value) VALUES (?, ?)',
+            [('name', name), ('format', 'png'), ('type', 'baselayer'), ('version', '1.1')]
+        )
+        conn.commit()
+        self.manifest = self._load_manifest()
+
+    def _create_schema(self, conn):
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tiles (
+                zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+        """)
+
+    def _load_manifest(self):
+        row = self._connection().execute(
+            "SELECT value FROM metadata WHERE name='tile_manifest'"
+        ).fetchone()
+        if row:
+            try:
+                return TileManifest.from_dict(json.loads(row[0]))
+            except ValueError:
+                pass
+        manifest = TileManifest.from_tiles(self.iter_tiles())
+        self._save_manifest(manifest)
+        return manifest
+
+    def _save_manifest(self, manifest):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO metadata (name, value) VALUES ('tile_manifest', ?)",
+                (json.dumps(manifest.to_dict()),)
+            )
+        manifest.dirty = False
+
+    def rebuild_manifest(self):
+        """Manifest'i tiles tablosundan baştan oluştur"""
+        self.manifest = TileManifest.from_tiles(self.iter_tiles())
+        self._save_manifest(self.manifest)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _tms_row(zoom, y):
+        return (1 << zoom) - 1 - y
+
+    def has_tile(self, zoom, x, y):
+        with self._lock:
+            if (zoom, x, y) in self._pending:
+                return True
+        row = self._connection().execute(
+            f'SELECT 1 FROM {self._index_table} WHERE zoom_level=? AND tile_column=? AND tile_row=?',
+            (zoom, x, self._tms_row(zoom, y))
+        ).fetchone()
+        return row is not None
+
+    def get_tile(self, zoom, x, y):
+        with self._lock:
+            data = self._pending.get((zoom, x, y))
+        if data is not None:
+            return data
+        row = self._connection().execute(
+            'SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?',
+            (zoom, x, self._tms_row(zoom, y))
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def put_tile(self, zoom, x, y, data):
+        with self._lock:
+            self._pending[(zoom, x, y)] = data
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, {}
+        self._write_batch(batch)
+
+    def flush(self):
+        """Bekleyen tile'ları veritabanına yaz"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if batch:
+            self._write_batch(batch)
+
+    def _new_tiles(self, conn, batch):
+        """Batch'teki tile'lardan veritabanında henüz olmayanlar"""
+        return [
+            (z, x, y) for z, x, y in batch
+            if conn.execute(
+                f'SELECT 1 FROM {self._index_table} WHERE zoom_level=? AND tile_column=? AND tile_row=?',
+                (z, x, self._tms_row(z, y))
+            ).fetchone() is None
+        ]
+
+    def _insert_tiles(self, conn, batch, replaced):
+        conn.executemany(
+            'INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)',
+            [(z, x, self._tms_row(z, y), sqlite3.Binary(data)) for (z, x, y), data in batch.items()]
+        )
+
+    def _write_batch(self, batch):
+        conn = self._connection()
+        with conn:
+            # Manifest'e yalnızca gerçekten yeni olan tile'lar eklenir
+            new_tiles = self._new_tiles(conn, batch)
+            self._insert_tiles(conn, batch, replaced=len(new_tiles) < len(batch))
+            for tile in new_tiles:
+                self.manifest.add(*tile)
+            conn.execute(
+                "INSERT OR REPLACE INTO metadata (name, value) VALUES ('tile_manifest', ?)",
+                (json.dumps(self.manifest.to_dict()),)
+            )
+        self.manifest.dirty = False
+
+    def set_format(self, tile_format):
+        """metadata'daki format alanını güncelle (MBTiles tek format varsayar)"""
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO metadata (name, value) VALUES ('format', ?)", (tile_format,))
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def iter_tiles(self):
+        if self._pending:
+            self.flush()
+        rows = self._connection().execute('SELECT zoom_level, tile_column, tile_row FROM tiles').fetchall()
+        for zoom, x, row in rows:
+            yield zoom, x, self._tms_row(zoom, row)
+
+
+class DedupMBTilesTileStore(MBTilesTileStore):
+    """Aynı içerikli tile'ları bir kez saklayan MBTiles deposu
+
+    Yaygın MBTiles düzeni kullanılır: images (tile_id → veri) ve map
+    (z/x/y → tile_id) tabloları, okuyucular için de bunları birleştiren bir
+    tiles view'ı. tile_id verinin MD5 özetidir; deniz, çöl ve boş tile'lar
+    gibi bayt bayt aynı tile'lar diskte tek kopya tutar.
+    """
+    _index_table = 'map'
+
+    def __init__(self, path, batch_size=200, name='satellite'):
+        self._replaced = False
+        super().__init__(path, batch_size=batch_size, name=name)
+
+    def _create_schema(self, conn):
+        row = conn.execute("SELECT type FROM sqlite_master WHERE name='tiles'").fetchone()
+        if row and row[0] == 'table':
+            raise ValueError(f"{self.path} tekilleştirilmiş MBTiles değil (tiles bir tablo)")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS images (tile_id TEXT PRIMARY KEY, tile_data BLOB);
+            CREATE TABLE IF NOT EXISTS map (
+                zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_id TEXT
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS map_index ON map (zoom_level, tile_column, tile_row);
+            CREATE VIEW IF NOT EXISTS tiles AS
+                SELECT map.zoom_level AS zoom_level, map.tile_column AS tile_column,
+                       map.tile_row AS tile_row, images.tile_data AS tile_data
+                FROM map JOIN images ON images.tile_id = map.tile_id;
+        """)
+
+    @staticmethod
+    def content_hash(data):
+        return hashlib.md5(data).hexdigest()
+
+    def _insert_tiles(self, conn, batch, replaced):
+        rows = []
+        images = {}
+        for (z, x, y), data in batch.items():
+            tile_id = self.content_hash(data)
+            images[tile_id] = data
+            rows.append((z, x, self._tms_row(z, y), tile_id))
+        if replaced:
+            self._replaced = True  # Eski içerik artık hiçbir tile'a ait olmayabilir
+        conn.executemany(
+            'INSERT OR IGNORE INTO images (tile_id, tile_data) VALUES (?, ?)',
+            [(tile_id, sqlite3.Binary(data)) for tile_id, data in images.items()]
+        )
+        conn.executemany(
+            'INSERT OR REPLACE INTO map (zoom_level, tile_column, tile_row, tile_id) VALUES (?, ?, ?, ?)',
+            rows
+        )
+
+    def tile_hash(self, zoom, x, y):
+        """Tile'ın içerik özeti (yazılmamış veya olmayan tile için None)"""
+        row = self._connection().execute(
+            'SELECT tile_id FROM map WHERE zoom_level=? AND tile_column=? AND tile_row=?',
+            (zoom, x, self._tms_row(zoom, y))
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_blob(self, tile_id):
+        row = self._connection().execute(
+            'SELECT tile_data FROM images WHERE tile_id=?', (tile_id,)
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def remove_orphan_images(self):
+        """Hiçbir tile'ın göstermediği içerikleri sil"""
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM images WHERE tile_id NOT IN (SELECT tile_id FROM map)')
+        self._replaced = False
+
+    def dedup_stats(self):
+        """Tekilleştirme istatistikleri (tile/içerik sayısı, mantıksal/fiziksel bayt)"""
+        self.flush()
+        conn = self._connection()
+        tile_count = conn.execute('SELECT COUNT(*) FROM map').fetchone()[0]
+        image_count, stored_bytes = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(tile_data)), 0) FROM images'
+        ).fetchone()
+        logical_bytes = conn.execute(
+            'SELECT COALESCE(SUM(LENGTH(images.tile_data)), 0) FROM map JOIN images ON images.tile_id = map.tile_id'
+        ).fetchone()[0]
+        return {
+            'tiles': tile_count,
+            'images': image_count,
+            'logical_bytes': logical_bytes,
+            'stored_bytes': stored_bytes,
+            'dedup_ratio': tile_count / image_count if image_count else 1.0,
+        }
+
+    def close(self):
+        self.flush()
+        if self._replaced:
+            self.remove_orphan_images()
+        super().close()
+
+
+class TileMetadata:
+    """Tile'ların kaynak sunucudaki doğrulayıcıları (ETag, Last-Modified) ve alınma zamanı
+
+    Yenileme modunda koşullu istek için, alınma zamanı da yalnızca eskimiş
+    tile'ları yenilemek için kullanılır. Kayıtlar bellekte
+    biriktirilip toplu yazılır; depo türünden bağımsız ayrı bir SQLite dosyasıdır.
+    """
+    def __init__(self, path, batch_size=200):
+        self.path = path
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tile_meta (
+                zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER,
+                etag TEXT, last_modified TEXT, fetched_at REAL,
+                PRIMARY KEY (zoom_level, tile_column, tile_row)
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def get(self, zoom, x, y):
+        """{'etag', 'last_modified', 'fetched_at'} veya None"""
+        with self._lock:
+            row = self._pending.get((zoom, x, y))
+        if row is None:
+            row = self._connection().execute(
+                'SELECT etag, last_modified, fetched_at FROM tile_meta '
+                'WHERE zoom_level=? AND tile_column=? AND tile_row=?',
+                (zoom, x, y)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'fetched_at': row[2]}
+
+    def fetched_since(self, cutoff):
+        """cutoff (epoch saniye) ve sonrasında alınmış tile'ların kümesi"""
+        with self._lock:
+            recent = {key for key, row in self._pending.items() if row[2] >= cutoff}
+        rows = self._connection().execute(
+            'SELECT zoom_level, tile_column, tile_row FROM tile_meta WHERE fetched_at >= ?', (cutoff,)
+        )
+        recent.update(tuple(row) for row in rows)
+        return recent
+
+    def record(self, zoom, x, y, etag, last_modified):
+        with self._lock:
+            self._pending[(zoom, x, y)] = (etag, last_modified, time.time())
+            if len(self._pending) < self.batch_size:
+                return
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO tile_meta VALUES (?, ?, ?, ?, ?, ?)',
+                [(z, x, y, etag, modified, fetched) for (z, x, y), (etag, modified, fetched) in batch.items()]
+            )
+
+
+def is_dedup_mbtiles(path):
+    """Var olan MBTiles dosyası map/images düzeninde mi"""
+    if not os.path.exists(path):
+        return False
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='map'").fetchone()
+    finally:
+        conn.close()
+    return row is not None
+
+
+def open_mbtiles(path, dedup=False):
+    """MBTiles dosyasını düzenine uygun sınıfla aç; yeni dosyada dedup seçimi geçerli"""
+    if is_dedup_mbtiles(path):
+        return DedupMBTilesTileStore(path)
+    if dedup and not os.path.exists(path):
+        return DedupMBTilesTileStore(path)
+    if dedup:
+        print(f"{path} tekilleştirilmemiş düzende, olduğu gibi açılıyor (dönüştürmek için: tile_store.py dedup)")
+    return MBTilesTileStore(path)
+
+
+def open_tile_store(path):
+    """Yola göre uygun tile deposunu aç (.mbtiles → SQLite, aksi halde dizin)"""
+    if path.endswith('.mbtiles'):
+        return open_mbtiles(path)
+    return DirectoryTileStore(path)
+
+
+def convert_directory_to_mbtiles(tiles_dir, mbtiles_path, batch_size=500, dedup=False):
+    """Mevcut tile deposunu (dizin veya MBTiles) tek bir MBTiles dosyasına aktar"""
+    source = open_tile_store(tiles_dir)
+    if dedup:
+        target = DedupMBTilesTileStore(mbtiles_path, batch_size=batch_size)
+    else:
+        target = MBTilesTileStore(mbtiles_path, batch_size=batch_size)
+    count = 0
+    formats = set()
+    try:
+        for zoom, x, y in source.iter_tiles():
+            data = source.get_tile(zoom, x, y)
+            if data is None:
+                continue
+            target.put_tile(zoom, x, y, data)
+            formats.add(detect_tile_format(data))
+            count += 1
+            if count % 1000 == 0:
+                print(f"Aktarıldı: {count} tile")
+        if len(formats) == 1 and None not in formats:
+            target.set_format(formats.pop())
+        if dedup:
+            print_dedup_stats(target.dedup_stats())
+    finally:
+        target.close()
+        source.close()
+    print(f"Dönüştürme tamamlandı: {count} tile → {mbtiles_path}")
+    return count
+
+
+def print_coverage_report(tile_store):
+    """Zoom başına tile sayısı ve kapsanan yaklaşık alan"""
+    by_zoom = {}
+    for zoom, x, y in tile_store.iter_tiles():
+        columns = by_zoom.setdefault(zoom, ([], []))
+        columns[0].append(x)
+        columns[1].append(y)
+    for zoom in sorted(by_zoom):
+        xs, ys = by_zoom[zoom]
+        line = f"  Zoom {zoom}: {len(xs)} tile"
+        if NUMPY_AVAILABLE:
+            line += f", ~{tiles_area_km2(xs, ys, zoom):.2f} km²"
+        print(line)
+
+
+def print_dedup_stats(stats):
+    saved = (1 - stats['stored_bytes'] / stats['logical_bytes']) * 100 if stats['logical_bytes'] else 0
+    print(
+        f"Tekilleştirme: {stats['tiles']} tile, {stats['images']} benzersiz içerik "
+        f"(oran {stats['dedup_ratio']:.2f}), {stats['logical_bytes'] / 1e6:.1f} MB → "
+        f"{stats['stored_bytes'] / 1e6:.1f} MB (%{saved:.0f} tasarruf)"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] in ('convert', 'dedup'):
+        convert_directory_to_mbtiles(sys.argv[2], sys.argv[3], dedup=sys.argv[1] == 'dedup')
+    elif len(sys.argv) == 3 and sys.argv[1] == 'stats':
+        store = open_tile_store(sys.argv[2])
+        if isinstance(store, DedupMBTilesTileStore):
+            print_dedup_stats(store.dedup_stats())
+        else:
+            print(f"{store.manifest.count()} tile (tekilleştirilmemiş depo)")
+        print_coverage_report(store)
+        store.close()
+    elif len(sys.argv) == 3 and sys.argv[1] == 'rebuild-manifest':
+        store = open_tile_store(sys.argv[2])
+        store.rebuild_manifest()
+        print(f"Manifest yeniden oluşturuldu: {store.manifest.count()} tile")
+        store.close()
+    else:
+        print("Kullanım: python tile_store.py convert <tiles_dizini> <hedef.mbtiles>")
+        print("          python tile_store.py dedup <tiles_dizini | dosya.mbtiles> <hedef.mbtiles>")
+        print("          python tile_store.py stats <tiles_dizini | dosya.mbtiles>")
+        print("          python tile_store.py rebuild-manifest <tiles_dizini | dosya.mbtiles>")
+        sys.exit(1)
@@ -0,0 +1,371 @@
+// Harita sayfası: Leaflet'i Python'un verdiği adresten yükler, haritayı ayarlarla
+// kurar ve Python'un QWebChannel üzerinden gönderdiği render mesajlarını işler.
+// Sayfa statik olduğundan tarayıcı önbelleğinde tutulur, yeniden yüklemesi ucuzdur.
+(function() {
+    var ERROR_TILE_URL = 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAQAAAAEACAYAAABccqhmAAAABHNCSVQICAgIfAhkiAAAAAlwSFlzAAAN1wAADdcBQiibeAAAABl0RVh0U29mdHdhcmUAd3d3Lmlua3NjYXBlLm9yZ5vuPBoAAANbSURBVHic7doxAQAACMOwgX+TaWfBDyZAXOvdAeBNAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUgTAEIUwDCFIAwBSBMAQhTAMIUgDAFIEwBCFMAwhSAMAUg7AcAAAD//2Q9CQMAAAAZdEVYdENvbW1lbnQAQ3JlYXRlZCB3aXRoIEdJTVBkLmUHAAAAAElFTkSuQmCC';  // Boş gri tile
+    var ICON_SIZE = 25;
+    var LABEL_RADIUS = 10;
+    // Her tür kendi katman grubunda tutulur; temizlemek tek grubu boşaltmaktır
+    var OVERLAY_TYPES = ['restricted', 'flightAreas', 'waypoints', 'route', 'contacts'];
+
+    var map = null;
+    var satelliteLayer = null;
+    var renderMode = 'canvas';  // 'canvas' veya 'dom' (her nesne ayrı DOM elemanı)
+    var routeChunkSize = 500;
+    var overlays = {};  // tür -> { group, renderer }
+    var iconUrls = {};
+    var iconImages = {};  // canvas modunda çizilen ikon resimleri
+    var domIcons = {};  // dom modunda kullanılan L.icon'lar
+
+    var flightMarker = null;
+    var flightRouteChunk = null;
+    var contactMarkers = {};
+    var waypointLine = null;
+    var waypointMarker = null;
+
+    function loadLeaflet(config, callback) {
+        if (window.L) {
+            callback();
+            return;
+        }
+        var css = document.createElement('link');
+        css.rel = 'stylesheet';
+        css.href = config.leaflet.css;
+        document.head.appendChild(css);
+
+        var script = document.createElement('script');
+        script.src = config.leaflet.js;
+        script.onload = callback;
+        script.onerror = function() {
+            console.log('Leaflet yüklenemedi: ' + config.leaflet.js);
+        };
+        document.head.appendChild(script);
+    }
+
+    // Canvas modunda nokta nesneleri DOM elemanı yerine tür canvas'ına çizilir.
+    // L.CircleMarker konum, sınır ve yeniden çizim takibini sağlar; yalnızca
+    // çizim adımı değiştirilir. Leaflet'in kendi daireleri gibi yalnızca
+    // renderer'ın çizim döngüsünde ve görünür alandaysa çizilir (setLatLng
+    // sonrası doğrudan gelen çağrılar atlanır, bir sonraki karede çizilir).
+    function canvasDrawable(layer) {
+        return layer._renderer._drawing && !layer._empty();
+    }
+
+    function defineCanvasMarkers() {
+        L.CanvasIconMarker = L.CircleMarker.extend({
+            _updatePath: function() {
+                var image = this.options.image;
+                if (!canvasDrawable(this) || !image.complete || !image.naturalWidth) {
+                    return;  // Resim yüklenince katman yeniden çizilir
+                }
+                var size = this._radius * 2;
+                this._renderer._ctx.drawImage(image, this._point.x - this._radius, this._point.y - this._radius, size, size);
+            }
+        });
+
+        L.CanvasLabelMarker = L.CircleMarker.extend({
+            _updatePath: function() {
+                if (!canvasDrawable(this)) {
+                    return;
+                }
+                var ctx = this._renderer._ctx;
+                var p = this._point;
+                ctx.beginPath();
+                ctx.arc(p.x, p.y, this._radius, 0, Math.PI * 2);
+                ctx.fillStyle = '#FFA500';
+                ctx.fill();
+                ctx.lineWidth = 2;
+                ctx.strokeStyle = 'white';
+                ctx.stroke();
+                ctx.fillStyle = 'white';
+                ctx.font = 'bold 12px sans-serif';
+                ctx.textAlign = 'center';
+                ctx.textBaseline = 'middle';
+                ctx.fillText(this.options.label, p.x, p.y);
+            }
+        });
+    }
+
+    function createOverlays() {
+        OVERLAY_TYPES.forEach(function(type) {
+            overlays[type] = {
+                group: L.layerGroup().addTo(map),
+                // Her türün kendi canvas'ı var; bir türdeki değişiklik diğerlerini yeniden çizdirmez.
+                // dom modunda haritanın varsayılan (SVG) renderer'ı kullanılır.
+                renderer: renderMode === 'canvas' ? L.canvas({ padding: 0.5 }) : undefined
+            };
+        });
+    }
+
+    function addOverlay(type, layer) {
+        return layer.addTo(overlays[type].group);
+    }
+
+    function clearOverlay(type) {
+        overlays[type].group.clearLayers();
+    }
+
+    function pathOptions(type, options) {
+        options.renderer = overlays[type].renderer;
+        return options;
+    }
+
+    function iconMarker(type, latlng, name) {
+        if (renderMode === 'canvas') {
+            return new L.CanvasIconMarker(latlng, {
+                renderer: overlays[type].renderer,
+                image: iconImages[name],
+                radius: ICON_SIZE / 2,
+                interactive: false
+            });
+        }
+        return L.marker(latlng, { icon: domIcons[name] });
+    }
+
+    function labelMarker(type, latlng, label) {
+        if (renderMode === 'canvas') {
+            return new L.CanvasLabelMarker(latlng, {
+                renderer: overlays[type].renderer,
+                label: String(label),
+                radius: LABEL_RADIUS,
+                interactive: false
+            });
+        }
+        return L.marker(latlng, {
+            icon: L.divIcon({
+                html: '<div style="background: #FFA500; color: white; border-radius: 50%; width: 20px; height: 20px; display: flex; align-items: center; justify-content: center; font-weight: bold; font-size: 12px; border: 2px solid white;">' + label + '</div>',
+                className: '',
+                iconSize: [LABEL_RADIUS * 2, LABEL_RADIUS * 2],
+                iconAnchor: [LABEL_RADIUS, LABEL_RADIUS]
+            })
+        });
+    }
+
+    // İkonlar bir kez kaydedilir; güncellemeler ikonlara adıyla başvurur
+    function loadIcons(urls) {
+        iconUrls = urls;
+        ['waypoint', 'enemy'].forEach(function(name) {
+            domIcons[name] = L.icon({ iconUrl: urls[name], iconSize: [ICON_SIZE, ICON_SIZE] });
+            var image = new Image();
+            image.onload = function() {
+                // Resimden önce eklenen canvas işaretçilerini çiz
+                OVERLAY_TYPES.forEach(function(type) {
+                    overlays[type].group.eachLayer(function(layer) {
+                        if (layer.options.image === image) {
+                            layer.redraw();
+                        }
+                    });
+                });
+            };
+            image.src = urls[name];
+            iconImages[name] = image;
+        });
+    }
+
+    function initMap(config) {
+        console.log('Harita başlatılıyor...');
+        console.log('Tile URL: ' + config.tileUrl);
+        routeChunkSize = config.routeChunkSize;
+        renderMode = config.renderMode === 'dom' ? 'dom' : 'canvas';
+        console.log('Render modu: ' + renderMode);
+
+        map = L.map('map').setView(config.center, config.zoom);
+
+        // Uydu görünümü katmanı (dinamik URL)
+        satelliteLayer = L.tileLayer(config.tileUrl, {
+            attribution: 'Tiles &copy; Esri',
+            maxZoom: config.maxZoom,  // 18 üstü tile server'da üst zoom'dan üretilir
+            minZoom: config.minZoom,
+            errorTileUrl: ERROR_TILE_URL
+        });
+
+        satelliteLayer.addTo(map);
+        console.log('Satellite layer eklendi');
+
+        defineCanvasMarkers();
+        createOverlays();
+        loadIcons(config.icons);
+
+        // Test için bir tile yüklenip yüklenmediğini kontrol et
+        satelliteLayer.on('tileerror', function(e) {
+            console.log('Tile hatası: ' + e.tile.src);
+        });
+
+        // Sağ tıklama olayını dinle
+        map.on('contextmenu', function(e) {
+            window.pyObj.rightClickReceived(e.latlng.lat, e.latlng.lng);
+        });
+
+        // Tıklama olayını dinle
+        map.on('click', function(e) {
+            window.pyObj.coordinatesClicked(e.latlng.lat, e.latlng.lng);
+        });
+
+        console.log('Harita hazır!');
+        window.pyObj.mapReady();
+    }
+
+    // Python'dan gelen [işlem, argümanlar...] mesajlarını işleyen fonksiyonlar.
+    // Bu modül bir kez derlenir; güncellemeler yalnızca veri olarak gelir.
+    var render = {
+        // Sayfayı yeniden yüklemeden merkezi ve tile kaynağını değiştir
+        config: function(config) {
+            map.setView(config.center, config.zoom);
+            satelliteLayer.setUrl(config.tileUrl);
+        },
+
+        tileUrl: function(url) {
+            satelliteLayer.setUrl(url);
+        },
+
+        // Drone işaretçisi tek ve dönen bir ikon olduğu için her modda DOM'dadır;
+        // bir kez oluşturulur, sonra yalnızca konum ve yön güncellenir
+        flightMarker: function(lat, lng, yaw) {
+            if (!flightMarker) {
+                flightMarker = L.marker([lat, lng], {
+                    icon: L.divIcon({
+                        html: '<div style="filter: hue-rotate(200deg);"><img src="' + iconUrls.uav + '" style="width: 25px; height: 25px;"></div>',
+                        className: '',
+                        iconSize: [ICON_SIZE, ICON_SIZE],
+                        iconAnchor: [ICON_SIZE / 2, ICON_SIZE / 2]
+                    })
+                }).addTo(map);
+            } else {
+                flightMarker.setLatLng([lat, lng]);
+            }
+            var element = flightMarker.getElement();
+            if (element && element.firstChild) {
+                element.firstChild.style.transform = 'rotate(' + yaw + 'deg)';
+            }
+        },
+
+        // Uçuş rotası: yalnızca yeni noktalar eklenir. Rota, en fazla routeChunkSize
+        // noktalık parçalardan oluşur; böylece her eklemede yalnızca son parça
+        // yeniden çizilir.
+        routeAppend: function(points) {
+            points.forEach(function(point) {
+                var chunk = flightRouteChunk;
+                if (!chunk || chunk.getLatLngs().length >= routeChunkSize) {
+                    var latlngs = chunk ? chunk.getLatLngs() : [];
+                    var start = latlngs.length ? [latlngs[latlngs.length - 1]] : [];
+                    chunk = addOverlay('route', L.polyline(start, pathOptions('route', {
+                        color: '#32CD32',
+                        weight: 3,
+                        opacity: 1.0
+                    })));
+                    flightRouteChunk = chunk;
+                }
+                chunk.addLatLng(point);
+            });
+        },
+
+        routeClear: function() {
+            clearOverlay('route');
+            flightRouteChunk = null;
+        },
+
+        // Düşman temasları: ID ile saklanır, mevcut işaretçiler yerinde taşınır
+        contactsUpsert: function(contacts) {
+            contacts.forEach(function(contact) {
+                var marker = contactMarkers[contact[0]];
+                if (marker) {
+                    marker.setLatLng([contact[1], contact[2]]);
+                } else {
+                    contactMarkers[contact[0]] = addOverlay('contacts', iconMarker('contacts', [contact[1], contact[2]], 'enemy'));
+                }
+            });
+        },
+
+        contactsRemove: function(ids) {
+            ids.forEach(function(id) {
+                var marker = contactMarkers[id];
+                if (marker) {
+                    overlays.contacts.group.removeLayer(marker);
+                    delete contactMarkers[id];
+                }
+            });
+        },
+
+        waypointRoute: function(points) {
+            if (waypointLine) {
+                waypointLine.setLatLngs(points);
+                return;
+            }
+            waypointLine = addOverlay('waypoints', L.polyline(points, pathOptions('waypoints', {
+                color: '#FFD700',
+                weight: 4,
+                opacity: 0.8,
+                dashArray: '10, 5'
+            })));
+        },
+
+        // Son waypoint ikonla, tüm waypoint'ler sıra numarasıyla gösterilir
+        waypointAdd: function(lat, lng, number) {
+            if (waypointMarker) {
+                waypointMarker.setLatLng([lat, lng]);
+            } else {
+                waypointMarker = addOverlay('waypoints', iconMarker('waypoints', [lat, lng], 'waypoint'));
+            }
+            addOverlay('waypoints', labelMarker('waypoints', [lat, lng], number));
+        },
+
+        waypointsClear: function() {
+            clearOverlay('waypoints');
+            waypointLine = null;
+            waypointMarker = null;
+            console.log('Tüm waypointler ve numaraları temizlendi.');
+        },
+
+        restrictedArea: function(id, lat, lng, radius) {
+            addOverlay('restricted', L.circle([lat, lng], pathOptions('restricted', {
+                color: '#FF0000',
+                fillColor: '#FF0000',
+                fillOpacity: 0.15,
+                weight: 3,
+                radius: radius
+            })));
+        },
+
+        flightArea: function(id, latlngs) {
+            addOverlay('flightAreas', L.polygon(latlngs, pathOptions('flightAreas', {
+                color: '#00AA00',
+                fillColor: '#00FF00',
+                fillOpacity: 0.1,
+                weight: 2
+            })));
+        }
+    };
+
+    // Harita kurulmadan gelen paketler atlanır; Python mapReady'de tüm
+    // katmanları baştan gönderir.
+    function applyMessages(payload) {
+        if (!map) {
+            return;
+        }
+        JSON.parse(payload).forEach(function(message) {
+            var handler = render[message[0]];
+            if (!handler) {
+                console.log('Bilinmeyen render mesajı: ' + message[0]);
+                return;
+            }
+            // Bir mesajdaki hata diğer güncellemeleri engellemesin
+            try {
+                handler.apply(null, message.slice(1));
+            } catch (e) {
+                console.log('Render hatası (' + message[0] + '): ' + e);
+            }
+        });
+    }
+
+    new QWebChannel(qt.webChannelTransport, function(channel) {
+        window.pyObj = channel.objects.pyObj;
+        window.pyObj.renderMessages.connect(applyMessages);
+        // Ayarlar (merkez, tile kaynağı, Leaflet adresleri) Python'dan bir kez alınır
+        window.pyObj.mapConfig(function(configJson) {
+            var config = JSON.parse(configJson);
+            loadLeaflet(config, function() {
+                initMap(config);
+            });
+        });
+    });
+})();